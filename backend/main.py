@@ -6,7 +6,8 @@ FastAPI backend for codebase intelligence
 from dotenv import load_dotenv
 load_dotenv()
 
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
@@ -49,8 +50,18 @@ async def lifespan(app: FastAPI):
     from services.supabase_service import get_supabase_service
     get_supabase_service().reset_stuck_indexing_jobs()
     await load_demo_repos()
+    from services.github_connections import run_last_used_flusher, flush_last_used
+    last_used_flusher = asyncio.create_task(run_last_used_flusher())
     yield
-    # Shutdown (cleanup if needed)
+    # Shutdown
+    last_used_flusher.cancel()
+    with suppress(asyncio.CancelledError):
+        await last_used_flusher
+    # Off the loop like the periodic flushes; ids are drained atomically, so
+    # a cancelled flush still finishing in its thread can't double-write
+    await asyncio.to_thread(flush_last_used)
+    from services.github import close_github_client
+    await close_github_client()
 
 
 app = FastAPI(
@@ -1,4 +1,6 @@
 """Analysis routes - dependencies, impact, insights, style."""
+import asyncio
+
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 
@@ -7,6 +9,7 @@ from dependencies import (
     get_repo_or_404, repo_manager
 )
 from services.input_validator import InputValidator
+from services.repo_manager import RepoCloneError
 from middleware.auth import require_auth, AuthContext
 from services.observability import logger, metrics, capture_exception
 
@@ -175,22 +178,47 @@ async def get_codebase_dna(
         repo = get_repo_or_404(repo_id, auth.user_id)
 
         cached_dna = dna_extractor.load_from_cache(repo_id)
-        if cached_dna:
-            logger.debug("Using cached DNA", repo_id=repo_id)
-            if format == "markdown":
-                return {"dna": cached_dna.to_markdown(), "cached": True}
-            return {**cached_dna.to_dict(), "cached": True}
-
-        logger.info("Extracting codebase DNA", repo_id=repo_id)
-        metrics.increment("dna_extractions")
 
-        await repo_manager.ensure_clone(repo)
-        dna = dna_extractor.extract_dna(repo["local_path"], repo_id, include_paths=repo.get("include_paths"))
-        dna_extractor.save_to_cache(repo_id, dna)
+        if cached_dna is not None and not repo_manager.has_local_clone(repo_id):
+            # Fresh container: a re-clone just to confirm the cache would make
+            # a cache hit wait on git. Serve it; the next miss re-clones anyway
+            logger.debug("No local clone, serving cached DNA", repo_id=repo_id)
+            dna = cached_dna
+        else:
+            try:
+                await repo_manager.ensure_clone(repo)
+            except RepoCloneError:
+                # Can't check the tree (e.g. private repo on a fresh container);
+                # the last extraction beats a 503
+                if cached_dna is None:
+                    raise
+                logger.warning("Clone unavailable, serving cached DNA", repo_id=repo_id)
+                dna = cached_dna
+            else:
+                # Off the loop: even the freshness check reads git refs, and a
+                # miss walks the whole tree. extract_dna reuses cached_dna when
+                # HEAD (or failing that the tree fingerprint) still matches
+                dna = await asyncio.to_thread(
+                    dna_extractor.extract_dna,
+                    repo["local_path"], repo_id,
+                    include_paths=repo.get("include_paths"),
+                    cached=cached_dna,
+                )
+
+        # A fingerprint hit at a new HEAD comes back as a copy with the new
+        # ref -- worth saving, but nothing was re-analyzed
+        cached = cached_dna is not None and dna.tree_hash == cached_dna.tree_hash
+        if cached:
+            logger.debug("Using cached DNA", repo_id=repo_id)
+        else:
+            logger.info("Extracted codebase DNA", repo_id=repo_id)
+            metrics.increment("dna_extractions")
+        if dna is not cached_dna:
+            dna_extractor.save_to_cache(repo_id, dna)
 
         if format == "markdown":
-            return {"dna": dna.to_markdown(), "cached": False}
-        return {**dna.to_dict(), "cached": False}
+            return {"dna": dna.to_markdown(), "cached": cached}
+        return {**dna.to_dict(), "cached": cached}
 
     except HTTPException:
         raise
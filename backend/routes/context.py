@@ -51,7 +51,7 @@ async def assemble_context(
 
     from dependencies import context_assembler
 
-    start = time.time()
+    start = time.perf_counter()
     try:
         result = await context_assembler.assemble(
             task=request.task,
@@ -60,7 +60,7 @@ async def assemble_context(
             token_budget=request.token_budget,
         )
 
-        elapsed = time.time() - start
+        elapsed = time.perf_counter() - start
         logger.info(
             "Context assembled",
             repo_id=request.repo_id,
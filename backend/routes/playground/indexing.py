@@ -46,7 +46,7 @@ async def start_anonymous_indexing(
     background_tasks: BackgroundTasks,
 ) -> dict:
     """Start indexing a public GitHub repository for anonymous users."""
-    start_time = time.time()
+    start_time = time.perf_counter()
     limiter = get_limiter()
 
     # Session validation
@@ -151,7 +151,7 @@ async def start_anonymous_indexing(
             })
 
     # Create job and start background indexing
-    response_time_ms = int((time.time() - start_time) * 1000)
+    response_time_ms = int((time.perf_counter() - start_time) * 1000)
     if not redis_client:
         raise HTTPException(status_code=503, detail="Indexing service unavailable (Redis down)")
     job_manager = AnonymousIndexingJob(redis_client)
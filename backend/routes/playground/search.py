@@ -142,7 +142,7 @@ async def playground_search(
         raise HTTPException(status_code=400, detail=f"Invalid query: {query_error}")
 
     repo_id = _resolve_repo_id(request, limiter, limit_result, req)
-    start_time = time.time()
+    start_time = time.perf_counter()
 
     try:
         sanitized_query = InputValidator.sanitize_string(request.query, max_length=200)
@@ -187,7 +187,7 @@ async def playground_search(
             })
 
         cache.set_search_results(cache_key, repo_id, results, ttl=3600)
-        search_time = int((time.time() - start_time) * 1000)
+        search_time = int((time.perf_counter() - start_time) * 1000)
 
         return {
             "results": results, "count": len(results), "cached": False,
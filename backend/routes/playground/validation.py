@@ -116,7 +116,7 @@ async def count_code_files(
 @router.post("/validate-repo")
 async def validate_github_repo(request: ValidateRepoRequest) -> dict:
     """Validate a GitHub repository URL for anonymous indexing."""
-    start_time = time.time()
+    start_time = time.perf_counter()
 
     cache_key = f"validate:{request.github_url}"
     cached = cache.get(cache_key) if cache else None
@@ -161,7 +161,7 @@ async def validate_github_repo(request: ValidateRepoRequest) -> dict:
         repo_size_kb = metadata.get("size", 0)
         file_count = max(repo_size_kb // 3, 1)
 
-    response_time_ms = int((time.time() - start_time) * 1000)
+    response_time_ms = int((time.perf_counter() - start_time) * 1000)
     can_index = file_count <= ANONYMOUS_FILE_LIMIT
 
     result = {
@@ -14,7 +14,7 @@ import httpx
 
 from dependencies import (
     indexer, repo_manager, metrics, redis_client,
-    get_repo_or_404, user_limits, repo_validator
+    get_repo_or_404, user_limits, repo_validator, dna_extractor
 )
 from services.input_validator import InputValidator
 from services.indexing_events import get_event_publisher, IndexingStats
@@ -418,12 +418,14 @@ async def delete_repository(
         raise HTTPException(status_code=401, detail="User ID required")
     
     # Verify ownership (raises 404 if not found)
-    get_repo_or_404(repo_id, user_id)
+    repo = get_repo_or_404(repo_id, user_id)
     
     try:
         success = repo_manager.delete_repo(repo_id)
         if not success:
             raise HTTPException(status_code=500, detail="Failed to delete repository")
+        if repo.get("local_path"):
+            dna_extractor.forget_repo(repo["local_path"])
         
         logger.info("Repository deleted", repo_id=repo_id, user_id=user_id)
         return {"message": "Repository deleted successfully"}
@@ -491,7 +493,7 @@ async def index_repository(
     auth: AuthContext = Depends(require_auth)
 ):
     """Trigger indexing for a repository with tier-based size limits."""
-    start_time = time.time()
+    start_time = time.perf_counter()
     user_id = auth.user_id
     
     # Validate user_id
@@ -560,7 +562,7 @@ async def index_repository(
         repo_manager.update_file_count(repo_id, total_functions)
         repo_manager.update_last_commit(repo_id, current_commit)
         
-        duration = time.time() - start_time
+        duration = time.perf_counter() - start_time
         metrics.record_indexing(repo_id, duration, total_functions)
         
         return {
@@ -592,7 +594,7 @@ async def _run_async_indexing(
     
     Publishes events to Redis pub/sub for WebSocket clients.
     """
-    start_time = time.time()
+    start_time = time.perf_counter()
     publisher = get_event_publisher(redis_client)
     
     try:
@@ -684,7 +686,7 @@ async def _run_async_indexing(
         repo_manager.update_file_count(repo_id, total_files)
         repo_manager.update_last_commit(repo_id, current_commit)
         
-        duration = time.time() - start_time
+        duration = time.perf_counter() - start_time
         metrics.record_indexing(repo_id, duration, total_functions)
         
         # Publish completion event
@@ -61,7 +61,7 @@ async def search_code(
         raise HTTPException(status_code=400, detail=f"Invalid query: {query_error}")
     
     sanitized_query = InputValidator.sanitize_string(request.query, max_length=500)
-    start_time = time.time()
+    start_time = time.perf_counter()
     
     try:
         # Check cache
@@ -69,7 +69,7 @@ async def search_code(
             cached_results = cache.get_search_results(sanitized_query, request.repo_id)
         
         if cached_results:
-            duration = time.time() - start_time
+            duration = time.perf_counter() - start_time
             metrics.record_search(duration, cached=True)
             logger.info(
                 "Search completed (cache hit)",
@@ -94,7 +94,7 @@ async def search_code(
         with track_time("search_cache_set", repo_id=request.repo_id):
             cache.set_search_results(sanitized_query, request.repo_id, results, ttl=3600)
         
-        duration = time.time() - start_time
+        duration = time.perf_counter() - start_time
         metrics.record_search(duration, cached=False)
         
         logger.info(
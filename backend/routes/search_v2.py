@@ -83,7 +83,7 @@ async def search_v2(
         raise HTTPException(status_code=400, detail=f"Invalid query: {query_error}")
 
     sanitized_query = InputValidator.sanitize_string(request.query, max_length=500)
-    start_time = time.time()
+    start_time = time.perf_counter()
 
     try:
         cache_key = f"v2:{sanitized_query}:{request.repo_id}:{request.top_k}"
@@ -92,7 +92,7 @@ async def search_v2(
             cached = cache.get_search_results(cache_key, request.repo_id)
         
         if cached:
-            duration = time.time() - start_time
+            duration = time.perf_counter() - start_time
             metrics.record_search(duration, cached=True)
             logger.info(
                 "Search V2 completed (cache hit)",
@@ -119,7 +119,7 @@ async def search_v2(
         with track_time("search_v2_cache_set", repo_id=request.repo_id):
             cache.set_search_results(cache_key, request.repo_id, results, ttl=3600)
         
-        duration = time.time() - start_time
+        duration = time.perf_counter() - start_time
         metrics.record_search(duration, cached=False)
         
         logger.info(
@@ -307,7 +307,7 @@ async def run_indexing_job(
         max_files: If set, limit indexing to first N files (for partial indexing)
     """
     import time
-    start_time = time.time()
+    start_time = time.perf_counter()
     temp_path = job_manager.get_temp_path(job_id)
     repo_id = job_manager.generate_repo_id(job_id)
 
@@ -374,7 +374,7 @@ async def run_indexing_job(
             raise Exception("Indexing timed out")
 
         # --- Step 3: Mark complete ---
-        elapsed = time.time() - start_time
+        elapsed = time.perf_counter() - start_time
         stats = JobStats(
             files_processed=file_count,
             functions_indexed=total_functions,
@@ -0,0 +1,616 @@
+"""
+CodeDNA per-file analysis
+The pure, I/O-free half of DNA extraction: scan one file's text for every
+indicator in a single pass and fold what the analyzers find into a
+_PatternAccumulator. File discovery, reading, caching and repo-level
+checks live in dna_extractor.
+
+Kept free of I/O and instance state so it's cheap to ship to worker
+processes and straightforward to AOT-compile (mypyc/Cython) later.
+"""
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from collections import Counter
+from dataclasses import dataclass, field, fields
+import re
+
+try:
+    import ahocorasick
+except ModuleNotFoundError:
+    ahocorasick = None
+
+
+def _classify_function_name(name: str) -> Optional[str]:
+    """Naming style of a public function name, or None if it doesn't vote.
+
+    Uses str predicates (C loops) instead of a per-character generator --
+    this runs for every def in the repo.
+    """
+    if name.startswith('_'):
+        return None
+    if '_' in name:
+        return 'snake_case'
+    # first char lowercase + not all-lowercase means there's an uppercase hump
+    if name[0].islower() and not name.islower():
+        return 'camelCase'
+    return None
+
+
+_FRAMEWORK_INDICATORS: Dict[str, Tuple[str, ...]] = {
+    'fastapi': ('from fastapi', 'FastAPI()', 'APIRouter', 'fastapi.routing'),
+    'django-rest-framework': ('from rest_framework', 'rest_framework.views', 'APIView', 'ViewSet', 'serializers.Serializer'),
+    'django': ('from django', 'django.conf', 'INSTALLED_APPS', 'django.urls', 'django.views'),
+    'starlette': ('from starlette', 'Starlette()', 'starlette.routing'),
+    'flask': ('from flask', 'Flask(__name__)', '@app.route', 'flask.Blueprint'),
+    'aiohttp': ('from aiohttp', 'aiohttp.web', 'web.Application'),
+    'tornado': ('from tornado', 'tornado.web', 'RequestHandler'),
+    'express': ('require("express")', 'express()', 'app.use(', 'express.Router'),
+    'nextjs': ('from next', 'getServerSideProps', 'getStaticProps', 'next/router'),
+    'nestjs': ('@Module(', '@Injectable(', '@Controller(', 'NestFactory'),
+}
+
+# Compiled once at import; these run for every file in the repo. Whitespace
+# is [ \t] rather than \s so a match can't run across lines (e.g. 'class'
+# ending a comment line picking up the next line's first word).
+_RE_MIDDLEWARE_CLASS = re.compile(r'class[ \t]+(\w*Middleware\w*)')
+_RE_DEPENDS = re.compile(r'Depends\((\w+)\)')
+_RE_PERM_CLASSES = re.compile(r'permission_classes\s*=\s*\[([^\]]+)\]')
+_RE_REQUIRES = re.compile(r'requires\([\'"](\w+)[\'"]\)')
+_RE_CUSTOM_EXC = re.compile(r'class[ \t]+(\w*(?:Error|Exception)\w*)')
+_RE_FUNCDEF = re.compile(r'def[ \t]+(\w+)[ \t]*\(')
+_RE_CLASS_NAME = re.compile(r'class[ \t]+(\w+)')
+_RE_IMPORT = re.compile(r'^(?:from[ \t]+[\w.]+[ \t]+import|import)[ \t]+[^\n]+', re.MULTILINE)
+
+# indicator -> framework, so scoring walks only what a file actually matched
+_INDICATOR_FRAMEWORK: Dict[str, str] = {
+    indicator: framework
+    for framework, indicators in _FRAMEWORK_INDICATORS.items()
+    for indicator in indicators
+}
+
+_LOG_LEVELS = ('debug', 'info', 'warning', 'error', 'critical')
+
+# Every literal the detectors look for. Each file is scanned for all of
+# them in one pass (_count_indicators) and the detectors test membership
+# in the resulting Counter, instead of ~150 separate `in content` scans.
+_INDICATORS: Tuple[str, ...] = tuple(dict.fromkeys([
+    *(ind for inds in _FRAMEWORK_INDICATORS.values() for ind in inds),
+    # middleware
+    'class', 'Middleware', 'Middleware(', 'app.add_middleware', 'Depends(',
+    'MIDDLEWARE', 'django', '.middleware', 'MiddlewareMixin',
+    'process_request', 'process_response', 'permission_classes',
+    'authentication_classes', 'app.use(', '@app.before_request', '@app.after_request',
+    # auth
+    'require_auth', 'public_auth', 'AuthenticationMiddleware', 'AuthCredentials',
+    'AuthenticationBackend', 'requires(', 'login_required', 'flask_login',
+    'current_user', '@login_required', 'permission_required', 'request.user',
+    'get_repo_or_404', 'verify_ownership', 'user_id', '==', '.filter(', 'AuthContext',
+    # database
+    'from django.db import models', 'models.Model', 'models.UUIDField',
+    'models.AutoField', 'models.BigAutoField', 'models.DateTimeField',
+    'on_delete=models.CASCADE', 'from sqlalchemy', 'sqlalchemy', 'UUID', 'DateTime',
+    '@prisma/client', 'from tortoise', 'tortoise.models', 'gen_random_uuid()',
+    'SERIAL', 'TIMESTAMPTZ', 'TIMESTAMP', 'ENABLE ROW LEVEL SECURITY',
+    'ON DELETE CASCADE', 'get_supabase_service()', 'create_client(', 'DATABASES',
+    'create_engine(',
+    # errors
+    'HTTPException', 'logger.error', 'except', 'Exception', 'Error',
+    # logging
+    'from services.observability import logger', 'logging.getLogger',
+    'import logging', 'metrics.increment', 'metrics.gauge', 'structlog',
+    *(f'{prefix}{level}' for level in _LOG_LEVELS for prefix in ('logger.', 'logging.')),
+    *(f'.{level}(' for level in _LOG_LEVELS),
+    # tests
+    'import pytest', '@pytest', '@pytest.fixture', 'from unittest', 'import unittest',
+    'def setUp(', 'def tearDown(', 'from django.test', 'from unittest.mock import',
+    'from unittest import mock', 'import responses', 'pytest_mock', 'mocker',
+    '@patch(', 'factory_boy', 'factory.Factory', 'from faker import',
+    # config
+    'from dotenv import', 'load_dotenv', 'from environs import', 'import environ',
+    'django-environ', 'from decouple import', 'pydantic', 'BaseSettings', 'BaseModel',
+    'dynaconf', 'DJANGO_SETTINGS_MODULE', 'boto3', 'secretsmanager', 'hvac',
+    'os.getenv(', 'os.environ',
+    # keywords the naming/import regexes need, so files without them skip the regex
+    'def', 'import',
+]))
+
+# Case-insensitive checks, matched against content.lower()
+_FOLDED_INDICATORS: Tuple[str, ...] = ('auth', 'supabase', 'prisma', 'django', 'vault')
+
+
+def _build_automaton(words: Tuple[str, ...]):
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for word in words:
+        automaton.add_word(word, word)
+    automaton.make_automaton()
+    return automaton
+
+
+_AUTOMATON = _build_automaton(_INDICATORS)
+_FOLDED_AUTOMATON = _build_automaton(_FOLDED_INDICATORS)
+
+
+def _count_indicators(text: str, words: Tuple[str, ...], automaton) -> Counter:
+    """Occurrences of each word in text, one linear pass with Aho-Corasick.
+
+    Without pyahocorasick this falls back to str.count per word. Counts
+    only matter for framework scoring; everything else checks membership.
+    """
+    if automaton is None:
+        return Counter({word: n for word in words if (n := text.count(word))})
+    return Counter(word for _, word in automaton.iter(text))
+
+
+@dataclass(slots=True)
+class _FileScan:
+    """One file's content plus the indicators found in it"""
+    content: str
+    hits: Counter
+    folded_hits: Counter
+
+
+def _scan_content(content: str) -> _FileScan:
+    return _FileScan(
+        content=content,
+        hits=_count_indicators(content, _INDICATORS, _AUTOMATON),
+        folded_hits=_count_indicators(content.lower(), _FOLDED_INDICATORS, _FOLDED_AUTOMATON),
+    )
+
+
+@dataclass(slots=True)
+class AuthPattern:
+    """Detected authentication patterns"""
+    middleware_used: List[str] = field(default_factory=list)
+    auth_decorators: List[str] = field(default_factory=list)
+    ownership_checks: List[str] = field(default_factory=list)
+    auth_context_type: Optional[str] = None
+
+
+@dataclass(slots=True)
+class ServicePattern:
+    """Detected service layer patterns"""
+    singleton_services: List[str] = field(default_factory=list)
+    dependencies_file: Optional[str] = None
+    service_base_classes: List[str] = field(default_factory=list)
+    injection_pattern: Optional[str] = None
+
+
+@dataclass(slots=True)
+class DatabasePattern:
+    """Detected database patterns"""
+    orm_used: Optional[str] = None
+    connection_pattern: Optional[str] = None
+    has_rls: bool = False
+    id_type: str = "unknown"
+    timestamp_type: str = "unknown"
+    cascade_deletes: bool = False
+
+
+@dataclass(slots=True)
+class ErrorPattern:
+    """Detected error handling patterns"""
+    exception_classes: List[str] = field(default_factory=list)
+    http_exception_usage: bool = False
+    error_response_format: Optional[str] = None
+    logging_on_error: bool = False
+
+
+@dataclass(slots=True)
+class LoggingPattern:
+    """Detected logging patterns"""
+    logger_import: Optional[str] = None
+    log_levels_used: List[str] = field(default_factory=list)
+    structured_logging: bool = False
+    metrics_tracking: bool = False
+
+
+@dataclass(slots=True)
+class NamingConventions:
+    """Detected naming conventions"""
+    function_style: str = "unknown"
+    class_style: str = "unknown"
+    constant_style: str = "unknown"
+    file_style: str = "unknown"
+
+
+@dataclass(slots=True)
+class TestPattern:
+    """Detected testing patterns"""
+    framework: Optional[str] = None  # pytest, unittest, nose
+    fixture_style: Optional[str] = None  # pytest fixtures, setUp/tearDown
+    mock_library: Optional[str] = None  # unittest.mock, pytest-mock, responses
+    test_file_pattern: str = "test_*.py"
+    has_conftest: bool = False
+    has_factories: bool = False  # factory_boy, faker
+    coverage_config: bool = False
+
+
+@dataclass(slots=True)
+class ConfigPattern:
+    """Detected configuration patterns"""
+    env_loading: Optional[str] = None  # python-dotenv, environs, django-environ
+    settings_pattern: Optional[str] = None  # single file, split by env, pydantic
+    secrets_handling: Optional[str] = None  # env vars, vault, AWS secrets
+    config_validation: bool = False  # pydantic Settings, dynaconf
+
+
+@dataclass(slots=True)
+class _PatternAccumulator:
+    """Per-aspect state the file analyzers fill in during the single pass"""
+    framework_scores: Counter = field(default_factory=Counter)
+    middleware: List[str] = field(default_factory=list)
+    auth: AuthPattern = field(default_factory=AuthPattern)
+    database: DatabasePattern = field(default_factory=DatabasePattern)
+    errors: ErrorPattern = field(default_factory=ErrorPattern)
+    logging: LoggingPattern = field(default_factory=LoggingPattern)
+    log_levels: Dict[str, None] = field(default_factory=dict)  # ordered set
+    naming: NamingConventions = field(default_factory=NamingConventions)
+    function_styles: Counter = field(default_factory=Counter)
+    class_styles: Counter = field(default_factory=Counter)
+    imports: Counter = field(default_factory=Counter)
+    tests: TestPattern = field(default_factory=TestPattern)
+    config: ConfigPattern = field(default_factory=ConfigPattern)
+
+    def merge(self, later: "_PatternAccumulator") -> None:
+        """Fold in results for files that come after ours, as a serial pass would"""
+        self.framework_scores.update(later.framework_scores)
+        self.middleware.extend(later.middleware)
+        self.log_levels.update(later.log_levels)
+        self.function_styles.update(later.function_styles)
+        self.class_styles.update(later.class_styles)
+        self.imports.update(later.imports)
+        for name in ('auth', 'database', 'errors', 'logging', 'naming', 'tests', 'config'):
+            _merge_pattern(getattr(self, name), getattr(later, name))
+
+
+# Values the analyzers only set when nothing else has been detected yet
+_FALLBACK_VALUES = {
+    'orm_used': 'Supabase',
+    'logger_import': 'import logging',
+    'framework': 'unittest',
+}
+
+
+def _merge_pattern(target, later) -> None:
+    """Merge two pattern dataclasses: lists extend, later detections win"""
+    for f in fields(later):
+        value = getattr(later, f.name)
+        if isinstance(value, list):
+            getattr(target, f.name).extend(value)
+        elif value == f.default:
+            continue  # never detected in the later files
+        elif value == _FALLBACK_VALUES.get(f.name) and getattr(target, f.name):
+            continue
+        else:
+            setattr(target, f.name, value)
+
+
+def _analyze_framework(scan: _FileScan, acc: _PatternAccumulator):
+    # Score by occurrence count, not presence: a file with 40 APIRouter
+    # usages is a stronger signal than one stray import. The counts come
+    # straight from the per-file indicator scan.
+    scores = acc.framework_scores
+    for indicator, count in scan.hits.items():
+        framework = _INDICATOR_FRAMEWORK.get(indicator)
+        if framework:
+            scores[framework] += count
+
+
+def _analyze_middleware(scan: _FileScan, acc: _PatternAccumulator):
+    hits = scan.hits
+    content = scan.content
+    patterns = acc.middleware
+
+    # Starlette/ASGI middleware
+    if 'class' in hits and 'Middleware' in hits:
+        middlewares = _RE_MIDDLEWARE_CLASS.findall(content)
+        patterns.extend(middlewares)
+    if 'Middleware(' in hits:
+        patterns.append('Middleware(cls)')
+    if 'app.add_middleware' in hits:
+        patterns.append('app.add_middleware()')
+
+    # FastAPI Depends
+    if 'Depends(' in hits:
+        patterns.extend(f'Depends({dep})' for dep in _RE_DEPENDS.findall(content))
+
+    # Django middleware
+    if 'MIDDLEWARE' in hits and ('django' in hits or '.middleware' in hits):
+        patterns.append('Django MIDDLEWARE setting')
+    if 'MiddlewareMixin' in hits:
+        patterns.append('MiddlewareMixin')
+    if 'process_request' in hits or 'process_response' in hits:
+        patterns.append('Django middleware hooks')
+
+    # DRF middleware/permissions
+    if 'permission_classes' in hits:
+        patterns.extend(
+            f'DRF permission_classes: {perm.strip()}' for perm in _RE_PERM_CLASSES.findall(content)
+        )
+    if 'authentication_classes' in hits:
+        patterns.append('DRF authentication_classes')
+
+    # Express middleware
+    if 'app.use(' in hits:
+        patterns.append('app.use(middleware)')
+
+    # Flask decorators
+    if '@app.before_request' in hits:
+        patterns.append('@app.before_request')
+    if '@app.after_request' in hits:
+        patterns.append('@app.after_request')
+
+
+def _analyze_auth(scan: _FileScan, acc: _PatternAccumulator):
+    hits = scan.hits
+    pattern = acc.auth
+
+    # FastAPI patterns
+    if 'require_auth' in hits:
+        pattern.middleware_used.append('require_auth')
+    if 'public_auth' in hits:
+        pattern.middleware_used.append('public_auth')
+    if 'Depends(' in hits and 'auth' in scan.folded_hits:
+        pattern.auth_decorators.append('Depends(require_auth)')
+
+    # Starlette patterns
+    if 'AuthenticationMiddleware' in hits:
+        pattern.middleware_used.append('AuthenticationMiddleware')
+    if 'AuthCredentials' in hits:
+        pattern.auth_context_type = 'AuthCredentials'
+    if 'AuthenticationBackend' in hits:
+        pattern.middleware_used.append('AuthenticationBackend')
+    if 'requires(' in hits:
+        pattern.auth_decorators.extend(
+            f'@requires("{scope}")' for scope in _RE_REQUIRES.findall(scan.content)
+        )
+
+    # Flask patterns
+    if 'login_required' in hits:
+        pattern.auth_decorators.append('@login_required')
+    if 'flask_login' in hits:
+        pattern.middleware_used.append('flask_login')
+    if 'current_user' in hits:
+        pattern.auth_context_type = 'current_user'
+
+    # Django patterns
+    if '@login_required' in hits:
+        pattern.auth_decorators.append('@login_required')
+    if 'permission_required' in hits:
+        pattern.auth_decorators.append('@permission_required')
+    if 'request.user' in hits:
+        pattern.auth_context_type = 'request.user'
+
+    # Detect ownership checks
+    if 'get_repo_or_404' in hits:
+        pattern.ownership_checks.append('get_repo_or_404(repo_id, auth.user_id)')
+    if 'verify_ownership' in hits:
+        pattern.ownership_checks.append('verify_ownership')
+    if 'user_id' in hits and ('==' in hits or '.filter(' in hits):
+        pattern.ownership_checks.append('user_id check')
+
+    # Detect AuthContext
+    if 'AuthContext' in hits:
+        pattern.auth_context_type = 'AuthContext'
+
+
+def _analyze_database(scan: _FileScan, file_path: Path, acc: _PatternAccumulator):
+    hits = scan.hits
+    pattern = acc.database
+
+    # Check for Supabase
+    if 'supabase' in scan.folded_hits and not pattern.orm_used:
+        pattern.orm_used = 'Supabase'
+
+    # Check for Django ORM
+    if 'from django.db import models' in hits or 'models.Model' in hits:
+        pattern.orm_used = 'Django ORM'
+        if 'models.UUIDField' in hits:
+            pattern.id_type = 'UUID (Django UUIDField)'
+        elif 'models.AutoField' in hits or 'models.BigAutoField' in hits:
+            pattern.id_type = 'AutoField (Django)'
+        if 'models.DateTimeField' in hits:
+            pattern.timestamp_type = 'DateTimeField (Django)'
+        if 'on_delete=models.CASCADE' in hits:
+            pattern.cascade_deletes = True
+
+    # Check for SQLAlchemy
+    if 'from sqlalchemy' in hits or 'sqlalchemy' in hits:
+        pattern.orm_used = 'SQLAlchemy'
+        if 'UUID' in hits:
+            pattern.id_type = 'UUID (SQLAlchemy)'
+        if 'DateTime' in hits:
+            pattern.timestamp_type = 'DateTime (SQLAlchemy)'
+
+    # Check for Prisma (JS/TS)
+    if 'prisma' in scan.folded_hits or '@prisma/client' in hits:
+        pattern.orm_used = 'Prisma'
+
+    # Check for Tortoise ORM
+    if 'from tortoise' in hits or 'tortoise.models' in hits:
+        pattern.orm_used = 'Tortoise ORM'
+
+    # Check SQL files for patterns
+    if file_path.suffix == '.sql':
+        if 'gen_random_uuid()' in hits:
+            pattern.id_type = 'UUID (gen_random_uuid())'
+        elif 'SERIAL' in hits:
+            pattern.id_type = 'SERIAL'
+
+        if 'TIMESTAMPTZ' in hits:
+            pattern.timestamp_type = 'TIMESTAMPTZ'
+        elif 'TIMESTAMP' in hits:
+            pattern.timestamp_type = 'TIMESTAMP'
+
+        if 'ENABLE ROW LEVEL SECURITY' in hits:
+            pattern.has_rls = True
+
+        if 'ON DELETE CASCADE' in hits:
+            pattern.cascade_deletes = True
+
+    # Check Python for connection patterns
+    if file_path.suffix == '.py':
+        if 'get_supabase_service()' in hits:
+            pattern.connection_pattern = 'Singleton: get_supabase_service()'
+        elif 'create_client(' in hits:
+            pattern.connection_pattern = 'Direct: create_client()'
+        elif 'DATABASES' in hits and 'django' in scan.folded_hits:
+            pattern.connection_pattern = 'Django DATABASES setting'
+        elif 'create_engine(' in hits:
+            pattern.connection_pattern = 'SQLAlchemy: create_engine()'
+
+
+def _analyze_errors(scan: _FileScan, acc: _PatternAccumulator):
+    hits = scan.hits
+    pattern = acc.errors
+
+    if 'HTTPException' in hits:
+        pattern.http_exception_usage = True
+
+    if 'logger.error' in hits and ('except' in hits or 'Exception' in hits):
+        pattern.logging_on_error = True
+
+    # Find custom exception classes
+    if 'class' in hits and ('Error' in hits or 'Exception' in hits):
+        custom_exceptions = _RE_CUSTOM_EXC.findall(scan.content)
+        pattern.exception_classes.extend(custom_exceptions)
+
+
+def _analyze_logging(scan: _FileScan, acc: _PatternAccumulator):
+    hits = scan.hits
+    pattern = acc.logging
+
+    # Detect logger import/setup
+    if 'from services.observability import logger' in hits:
+        pattern.logger_import = 'from services.observability import logger'
+        pattern.structured_logging = True
+    elif 'logging.getLogger' in hits:
+        pattern.logger_import = 'logging.getLogger(__name__)'
+    elif 'import logging' in hits and not pattern.logger_import:
+        pattern.logger_import = 'import logging'
+
+    # Detect log levels (both logger.X and logging.X)
+    for level in _LOG_LEVELS:
+        if f'logger.{level}' in hits or f'logging.{level}' in hits or f'.{level}(' in hits:
+            acc.log_levels[level] = None
+
+    # Detect metrics
+    if 'metrics.increment' in hits or 'metrics.gauge' in hits:
+        pattern.metrics_tracking = True
+
+    # Detect structlog
+    if 'structlog' in hits:
+        pattern.structured_logging = True
+        pattern.logger_import = 'structlog'
+
+
+def _analyze_naming(scan: _FileScan, acc: _PatternAccumulator):
+    # Extract function names
+    if 'def' in scan.hits:
+        functions = _RE_FUNCDEF.findall(scan.content)
+        acc.function_styles.update(
+            style for style in map(_classify_function_name, functions) if style
+        )
+
+    # Extract class names
+    if 'class' in scan.hits:
+        classes = _RE_CLASS_NAME.findall(scan.content)
+        pascal = sum(1 for cls in classes if cls[0].isupper() and '_' not in cls)
+        if pascal:
+            acc.class_styles['PascalCase'] += pascal
+
+
+def _analyze_imports(scan: _FileScan, acc: _PatternAccumulator):
+    # Find all imports
+    if 'import' not in scan.hits:
+        return
+    imports = _RE_IMPORT.findall(scan.content)
+    for imp in imports:
+        imp = imp.strip()
+        if imp and not imp.startswith('#'):
+            acc.imports[imp] += 1
+
+
+def _analyze_tests(scan: _FileScan, acc: _PatternAccumulator):
+    hits = scan.hits
+    pattern = acc.tests
+
+    # Detect test framework
+    if 'import pytest' in hits or '@pytest' in hits:
+        pattern.framework = 'pytest'
+        if '@pytest.fixture' in hits:
+            pattern.fixture_style = 'pytest fixtures'
+    elif 'from unittest' in hits or 'import unittest' in hits:
+        if not pattern.framework:
+            pattern.framework = 'unittest'
+        if 'def setUp(' in hits or 'def tearDown(' in hits:
+            pattern.fixture_style = 'setUp/tearDown'
+    elif 'from django.test' in hits:
+        pattern.framework = 'django.test'
+        pattern.fixture_style = 'Django TestCase'
+
+    # Detect mock library
+    if 'from unittest.mock import' in hits or 'from unittest import mock' in hits:
+        pattern.mock_library = 'unittest.mock'
+    elif 'import responses' in hits:
+        pattern.mock_library = 'responses'
+    elif 'pytest_mock' in hits or 'mocker' in hits:
+        pattern.mock_library = 'pytest-mock'
+    elif '@patch(' in hits:
+        pattern.mock_library = 'unittest.mock (decorator)'
+
+    # Detect factories
+    if 'factory_boy' in hits or 'factory.Factory' in hits:
+        pattern.has_factories = True
+    if 'from faker import' in hits:
+        pattern.has_factories = True
+
+
+def _analyze_config(scan: _FileScan, acc: _PatternAccumulator):
+    hits = scan.hits
+    pattern = acc.config
+
+    # Detect env loading
+    if 'from dotenv import' in hits or 'load_dotenv' in hits:
+        pattern.env_loading = 'python-dotenv'
+    elif 'from environs import' in hits:
+        pattern.env_loading = 'environs'
+    elif 'import environ' in hits or 'django-environ' in hits:
+        pattern.env_loading = 'django-environ'
+    elif 'from decouple import' in hits:
+        pattern.env_loading = 'python-decouple'
+
+    # Detect settings pattern
+    if 'pydantic' in hits and ('BaseSettings' in hits or 'BaseModel' in hits):
+        pattern.settings_pattern = 'Pydantic Settings'
+        pattern.config_validation = True
+    elif 'dynaconf' in hits:
+        pattern.settings_pattern = 'Dynaconf'
+        pattern.config_validation = True
+    elif 'DJANGO_SETTINGS_MODULE' in hits:
+        pattern.settings_pattern = 'Django settings'
+
+    # Detect secrets handling
+    if 'boto3' in hits and 'secretsmanager' in hits:
+        pattern.secrets_handling = 'AWS Secrets Manager'
+    elif 'hvac' in hits or 'vault' in scan.folded_hits:
+        pattern.secrets_handling = 'HashiCorp Vault'
+    elif 'os.getenv(' in hits or 'os.environ' in hits:
+        pattern.secrets_handling = 'Environment variables'
+
+
+def analyze_file(file_path: Path, scan: _FileScan, acc: _PatternAccumulator) -> None:
+    """Hand one scanned file to every per-file analyzer"""
+    _analyze_framework(scan, acc)
+    _analyze_middleware(scan, acc)
+    _analyze_database(scan, file_path, acc)
+    _analyze_tests(scan, acc)
+    _analyze_config(scan, acc)
+    if file_path.suffix == '.py':
+        _analyze_auth(scan, acc)
+        _analyze_errors(scan, acc)
+        _analyze_logging(scan, acc)
+        _analyze_naming(scan, acc)
+        _analyze_imports(scan, acc)
@@ -4,97 +4,154 @@ Extracts architectural patterns, conventions, and constraints from a codebase.
 Generates a DNA document that helps AI understand how to write consistent code.
 """
 from pathlib import Path
-from typing import Dict, List, Optional
-from collections import Counter
-from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional, Tuple
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field, fields, replace
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from operator import itemgetter
+from stat import S_ISREG
+import hashlib
+import heapq
+import json
+import multiprocessing
+import os
+import pickle
 import re
+import sqlite3
+import threading
 
 import tree_sitter_python as tspython
 import tree_sitter_javascript as tsjavascript
 from tree_sitter import Language, Parser
+try:
+    import orjson
+except ModuleNotFoundError:
+    orjson = None
 
+from services.dna_analyzer import (
+    AuthPattern,
+    ServicePattern,
+    DatabasePattern,
+    ErrorPattern,
+    LoggingPattern,
+    NamingConventions,
+    TestPattern,
+    ConfigPattern,
+    _FileScan,
+    _PatternAccumulator,
+    _scan_content,
+    analyze_file,
+)
 from services.observability import logger
 from services.supabase_service import get_supabase_service
 
 
-@dataclass
-class AuthPattern:
-    """Detected authentication patterns"""
-    middleware_used: List[str] = field(default_factory=list)
-    auth_decorators: List[str] = field(default_factory=list)
-    ownership_checks: List[str] = field(default_factory=list)
-    auth_context_type: Optional[str] = None
+# Repo-level extractors (dependencies.py, services/, routes/); the per-file
+# regexes live in dna_analyzer
+_RE_SINGLETON = re.compile(r'^(\w+)\s*=\s*(\w+)\(\)', re.MULTILINE)
+_RE_CLASSDEF = re.compile(r'^class\s+(\w+)', re.MULTILINE)
+_RE_ROUTER_PREFIX = re.compile(r'APIRouter\(prefix=["\']([^"\']+)["\']')
 
 
-@dataclass
-class ServicePattern:
-    """Detected service layer patterns"""
-    singleton_services: List[str] = field(default_factory=list)
-    dependencies_file: Optional[str] = None
-    service_base_classes: List[str] = field(default_factory=list)
-    injection_pattern: Optional[str] = None
+# Grammars are immutable and shared; only Parser instances are per-thread
+_LANGUAGES = {
+    'python': Language(tspython.language()),
+    'javascript': Language(tsjavascript.language()),
+    'typescript': Language(tsjavascript.language()),
+}
 
 
-@dataclass 
-class DatabasePattern:
-    """Detected database patterns"""
-    orm_used: Optional[str] = None
-    connection_pattern: Optional[str] = None
-    has_rls: bool = False
-    id_type: str = "unknown"
-    timestamp_type: str = "unknown"
-    cascade_deletes: bool = False
+# Suffix -> language for the DNA language distribution. Built once rather
+# than per file; the values are literals, so every file shares the same
+# (already interned) string objects as Counter keys.
+_LANGUAGE_BY_SUFFIX = {
+    '.py': 'python',
+    '.js': 'javascript',
+    '.jsx': 'javascript',
+    '.ts': 'typescript',
+    '.tsx': 'typescript',
+}
 
 
-@dataclass
-class ErrorPattern:
-    """Detected error handling patterns"""
-    exception_classes: List[str] = field(default_factory=list)
-    http_exception_usage: bool = False
-    error_response_format: Optional[str] = None
-    logging_on_error: bool = False
+# Bytes read up front to reject binaries before reading the whole file
+_SNIFF_SIZE = 4096
 
 
-@dataclass
-class LoggingPattern:
-    """Detected logging patterns"""
-    logger_import: Optional[str] = None
-    log_levels_used: List[str] = field(default_factory=list)
-    structured_logging: bool = False
-    metrics_tracking: bool = False
+def _files_in(files: List[Path], directory: Path) -> List[Path]:
+    """Discovered .py files directly inside directory.
 
+    Discovery already walked the tree, so this replaces exists()/glob()
+    probes. Walk order within a directory matches glob's.
+    """
+    return [f for f in files if f.suffix == '.py' and f.parent == directory]
 
-@dataclass
-class NamingConventions:
-    """Detected naming conventions"""
-    function_style: str = "unknown"
-    class_style: str = "unknown"
-    constant_style: str = "unknown"
-    file_style: str = "unknown"
 
+def _read_source(file_path: Path, max_size: int) -> Tuple[Optional[str], str]:
+    """Read a source file as text.
+    
+    Raw os.open/os.read (no buffered file object) + fstat, then a 4KB head
+    read to sniff for binaries before pulling in the rest, so a misnamed
+    image/bundle costs one small read. The text is decoded exactly once.
+    Returns (content, stat) where stat is the _stats key to bump:
+    files_read, files_skipped (too big / binary) or read_errors.
+    """
+    try:
+        fd = os.open(file_path, os.O_RDONLY)
+        try:
+            size = os.fstat(fd).st_size
+            if size > max_size:
+                return None, 'files_skipped'
+            raw = os.read(fd, _SNIFF_SIZE)
+            # check for binary content (null bytes)
+            if b'\x00' in raw:
+                return None, 'files_skipped'
+            if len(raw) == _SNIFF_SIZE:
+                raw += os.read(fd, max(size - _SNIFF_SIZE, 0))
+        finally:
+            os.close(fd)
+    except OSError:
+        # counted, not logged -- one summary line at the end of extract_dna
+        return None, 'read_errors'
+    
+    try:
+        return raw.decode('utf-8'), 'files_read'
+    except UnicodeDecodeError:
+        # latin-1 maps every byte, so this can't fail
+        return raw.decode('latin-1'), 'files_read'
+
+
+# Nested pattern fields on CodebaseDNA, for (de)serialization
+_PATTERN_FIELDS = {
+    'auth_patterns': AuthPattern,
+    'service_patterns': ServicePattern,
+    'database_patterns': DatabasePattern,
+    'error_patterns': ErrorPattern,
+    'logging_patterns': LoggingPattern,
+    'naming_conventions': NamingConventions,
+    'test_patterns': TestPattern,
+    'config_patterns': ConfigPattern,
+}
+
+
+@lru_cache(maxsize=None)
+def _field_names(cls) -> Tuple[str, ...]:
+    """Serialized field names of a dataclass, looked up once per class"""
+    return tuple(f.name for f in fields(cls) if f.init)
 
-@dataclass
-class TestPattern:
-    """Detected testing patterns"""
-    framework: Optional[str] = None  # pytest, unittest, nose
-    fixture_style: Optional[str] = None  # pytest fixtures, setUp/tearDown
-    mock_library: Optional[str] = None  # unittest.mock, pytest-mock, responses
-    test_file_pattern: str = "test_*.py"
-    has_conftest: bool = False
-    has_factories: bool = False  # factory_boy, faker
-    coverage_config: bool = False
 
+def _shallow_dict(obj) -> Dict:
+    """Field dict without asdict's recursive deep copy. Lists are shared, not copied."""
+    return {name: getattr(obj, name) for name in _field_names(type(obj))}
 
-@dataclass
-class ConfigPattern:
-    """Detected configuration patterns"""
-    env_loading: Optional[str] = None  # python-dotenv, environs, django-environ
-    settings_pattern: Optional[str] = None  # single file, split by env, pydantic
-    secrets_handling: Optional[str] = None  # env vars, vault, AWS secrets
-    config_validation: bool = False  # pydantic Settings, dynaconf
 
+def _known_fields(cls, data: Dict) -> Dict:
+    """Drop keys the dataclass doesn't define (cache rows written by other versions)."""
+    names = _field_names(cls)
+    return {k: v for k, v in data.items() if k in names}
 
-@dataclass
+
+@dataclass(slots=True)
 class CodebaseDNA:
     """Complete DNA profile of a codebase"""
     repo_id: str
@@ -115,156 +172,301 @@ class CodebaseDNA:
     router_pattern: Optional[str] = None
     team_rules: Optional[str] = None
     team_rules_source: Optional[str] = None
+    tree_hash: Optional[str] = None  # fingerprint of the files this DNA was extracted from
+    source_ref: Optional[str] = None  # git HEAD (+ include_paths) it was extracted at
+    # Rendered output, built on first use. A DNA is read-only once extracted,
+    # and the route renders it after save_to_cache already did.
+    _dict: Optional[Dict] = field(default=None, init=False, repr=False, compare=False)
+    _markdown: Optional[str] = field(default=None, init=False, repr=False, compare=False)
     
     def to_dict(self) -> Dict:
-        return asdict(self)
+        if self._dict is None:
+            data = _shallow_dict(self)
+            for name in _PATTERN_FIELDS:
+                data[name] = _shallow_dict(data[name])
+            self._dict = data
+        # top-level copy so callers can add keys without touching the cache
+        return dict(self._dict)
+    
+    def to_json(self) -> bytes:
+        """to_dict() as UTF-8 JSON, via orjson when it's installed"""
+        if orjson is not None:
+            return orjson.dumps(self.to_dict())
+        return json.dumps(self.to_dict(), separators=(',', ':')).encode()
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'CodebaseDNA':
+        """Rebuild from to_dict() output (e.g. the cached JSONB payload)"""
+        kwargs = _known_fields(cls, data)
+        for name, pattern_cls in _PATTERN_FIELDS.items():
+            kwargs[name] = pattern_cls(**_known_fields(pattern_cls, data.get(name) or {}))
+        return cls(**kwargs)
     
     def to_markdown(self) -> str:
         """Generate markdown DNA document for AI consumption"""
-        md = "# Codebase DNA\n\n"
+        if self._markdown is None:
+            self._markdown = self._render_markdown()
+        return self._markdown
+    
+    def _render_markdown(self) -> str:
+        parts: List[str] = ["# Codebase DNA\n\n"]
         
         # Framework detection
         if self.detected_framework:
-            md += f"**Detected Framework:** {self.detected_framework}\n\n"
+            parts.append(f"**Detected Framework:** {self.detected_framework}\n\n")
         
         # Language distribution
-        md += "## Language Distribution\n"
-        for lang, count in sorted(self.language_distribution.items(), key=lambda x: -x[1]):
-            md += f"- {lang}: {count} files\n"
-        md += "\n"
+        parts.append("## Language Distribution\n")
+        parts.append("".join(
+            f"- {lang}: {count} files\n"
+            for lang, count in sorted(self.language_distribution.items(), key=lambda x: -x[1])
+        ))
+        parts.append("\n")
         
         # Middleware patterns
         if self.middleware_patterns:
-            md += "## Middleware Patterns\n"
-            for mw in self.middleware_patterns:
-                md += f"- `{mw}`\n"
-            md += "\n"
+            parts.append("## Middleware Patterns\n")
+            parts.append("".join(f"- `{mw}`\n" for mw in self.middleware_patterns))
+            parts.append("\n")
         
         # Auth patterns
-        md += "## Authentication Patterns\n"
+        parts.append("## Authentication Patterns\n")
         if self.auth_patterns.middleware_used:
-            md += f"**Middleware:** `{', '.join(self.auth_patterns.middleware_used)}`\n"
+            parts.append(f"**Middleware:** `{', '.join(self.auth_patterns.middleware_used)}`\n")
         if self.auth_patterns.auth_decorators:
-            md += f"**Decorators:** `{', '.join(self.auth_patterns.auth_decorators)}`\n"
+            parts.append(f"**Decorators:** `{', '.join(self.auth_patterns.auth_decorators)}`\n")
         if self.auth_patterns.ownership_checks:
-            md += f"**Ownership Checks:** `{', '.join(self.auth_patterns.ownership_checks)}`\n"
+            parts.append(f"**Ownership Checks:** `{', '.join(self.auth_patterns.ownership_checks)}`\n")
         if self.auth_patterns.auth_context_type:
-            md += f"**Auth Context:** `{self.auth_patterns.auth_context_type}`\n"
-        md += "\n"
+            parts.append(f"**Auth Context:** `{self.auth_patterns.auth_context_type}`\n")
+        parts.append("\n")
         
         # Service patterns
-        md += "## Service Layer Patterns\n"
+        parts.append("## Service Layer Patterns\n")
         if self.service_patterns.singleton_services:
-            md += f"**Singletons:** `{', '.join(self.service_patterns.singleton_services)}`\n"
+            parts.append(f"**Singletons:** `{', '.join(self.service_patterns.singleton_services)}`\n")
         if self.service_patterns.dependencies_file:
-            md += f"**Dependencies File:** `{self.service_patterns.dependencies_file}`\n"
+            parts.append(f"**Dependencies File:** `{self.service_patterns.dependencies_file}`\n")
         if self.service_patterns.injection_pattern:
-            md += f"**Injection Pattern:** {self.service_patterns.injection_pattern}\n"
-        md += "\n"
+            parts.append(f"**Injection Pattern:** {self.service_patterns.injection_pattern}\n")
+        parts.append("\n")
         
         # Database patterns
-        md += "## Database Patterns\n"
+        parts.append("## Database Patterns\n")
         if self.database_patterns.orm_used:
-            md += f"**ORM:** {self.database_patterns.orm_used}\n"
-        md += f"**ID Type:** `{self.database_patterns.id_type}`\n"
-        md += f"**Timestamp Type:** `{self.database_patterns.timestamp_type}`\n"
-        md += f"**RLS Enabled:** {self.database_patterns.has_rls}\n"
-        md += f"**Cascade Deletes:** {self.database_patterns.cascade_deletes}\n"
-        md += "\n"
+            parts.append(f"**ORM:** {self.database_patterns.orm_used}\n")
+        parts.append(f"**ID Type:** `{self.database_patterns.id_type}`\n")
+        parts.append(f"**Timestamp Type:** `{self.database_patterns.timestamp_type}`\n")
+        parts.append(f"**RLS Enabled:** {self.database_patterns.has_rls}\n")
+        parts.append(f"**Cascade Deletes:** {self.database_patterns.cascade_deletes}\n")
+        parts.append("\n")
         
         # Error handling
-        md += "## Error Handling\n"
+        parts.append("## Error Handling\n")
         if self.error_patterns.exception_classes:
-            md += f"**Exception Classes:** `{', '.join(self.error_patterns.exception_classes)}`\n"
-        md += f"**HTTP Exception:** {self.error_patterns.http_exception_usage}\n"
-        md += f"**Logs Errors:** {self.error_patterns.logging_on_error}\n"
-        md += "\n"
+            parts.append(f"**Exception Classes:** `{', '.join(self.error_patterns.exception_classes)}`\n")
+        parts.append(f"**HTTP Exception:** {self.error_patterns.http_exception_usage}\n")
+        parts.append(f"**Logs Errors:** {self.error_patterns.logging_on_error}\n")
+        parts.append("\n")
         
         # Logging
-        md += "## Logging Patterns\n"
+        parts.append("## Logging Patterns\n")
         if self.logging_patterns.logger_import:
-            md += f"**Import:** `{self.logging_patterns.logger_import}`\n"
+            parts.append(f"**Import:** `{self.logging_patterns.logger_import}`\n")
         if self.logging_patterns.log_levels_used:
-            md += f"**Levels Used:** `{', '.join(self.logging_patterns.log_levels_used)}`\n"
-        md += f"**Structured:** {self.logging_patterns.structured_logging}\n"
-        md += f"**Metrics:** {self.logging_patterns.metrics_tracking}\n"
-        md += "\n"
+            parts.append(f"**Levels Used:** `{', '.join(self.logging_patterns.log_levels_used)}`\n")
+        parts.append(f"**Structured:** {self.logging_patterns.structured_logging}\n")
+        parts.append(f"**Metrics:** {self.logging_patterns.metrics_tracking}\n")
+        parts.append("\n")
         
         # Naming
-        md += "## Naming Conventions\n"
-        md += f"- Functions: `{self.naming_conventions.function_style}`\n"
-        md += f"- Classes: `{self.naming_conventions.class_style}`\n"
-        md += f"- Constants: `{self.naming_conventions.constant_style}`\n"
-        md += f"- Files: `{self.naming_conventions.file_style}`\n"
-        md += "\n"
+        parts.append("## Naming Conventions\n")
+        parts.append(f"- Functions: `{self.naming_conventions.function_style}`\n")
+        parts.append(f"- Classes: `{self.naming_conventions.class_style}`\n")
+        parts.append(f"- Constants: `{self.naming_conventions.constant_style}`\n")
+        parts.append(f"- Files: `{self.naming_conventions.file_style}`\n")
+        parts.append("\n")
         
         # Common imports
         if self.common_imports:
-            md += "## Common Imports\n"
-            md += "```python\n"
-            for imp in self.common_imports[:15]:
-                md += f"{imp}\n"
-            md += "```\n\n"
+            parts.append("## Common Imports\n")
+            parts.append("```python\n")
+            # one C-level join for the whole block
+            parts.append("\n".join(self.common_imports[:15]))
+            parts.append("\n```\n\n")
         
         # API patterns
         if self.api_versioning or self.router_pattern:
-            md += "## API Patterns\n"
+            parts.append("## API Patterns\n")
             if self.api_versioning:
-                md += f"**Versioning:** `{self.api_versioning}`\n"
+                parts.append(f"**Versioning:** `{self.api_versioning}`\n")
             if self.router_pattern:
-                md += f"**Router:** `{self.router_pattern}`\n"
-            md += "\n"
+                parts.append(f"**Router:** `{self.router_pattern}`\n")
+            parts.append("\n")
         
         # Test patterns
         if self.test_patterns.framework:
-            md += "## Testing Patterns\n"
-            md += f"**Framework:** {self.test_patterns.framework}\n"
+            parts.append("## Testing Patterns\n")
+            parts.append(f"**Framework:** {self.test_patterns.framework}\n")
             if self.test_patterns.fixture_style:
-                md += f"**Fixture Style:** {self.test_patterns.fixture_style}\n"
+                parts.append(f"**Fixture Style:** {self.test_patterns.fixture_style}\n")
             if self.test_patterns.mock_library:
-                md += f"**Mock Library:** {self.test_patterns.mock_library}\n"
-            md += f"**Test File Pattern:** `{self.test_patterns.test_file_pattern}`\n"
+                parts.append(f"**Mock Library:** {self.test_patterns.mock_library}\n")
+            parts.append(f"**Test File Pattern:** `{self.test_patterns.test_file_pattern}`\n")
             if self.test_patterns.has_conftest:
-                md += "**Has conftest.py:** Yes\n"
+                parts.append("**Has conftest.py:** Yes\n")
             if self.test_patterns.has_factories:
-                md += "**Uses Factories:** Yes\n"
-            md += "\n"
+                parts.append("**Uses Factories:** Yes\n")
+            parts.append("\n")
         
         # Config patterns
         if self.config_patterns.env_loading or self.config_patterns.settings_pattern:
-            md += "## Configuration Patterns\n"
+            parts.append("## Configuration Patterns\n")
             if self.config_patterns.env_loading:
-                md += f"**Env Loading:** {self.config_patterns.env_loading}\n"
+                parts.append(f"**Env Loading:** {self.config_patterns.env_loading}\n")
             if self.config_patterns.settings_pattern:
-                md += f"**Settings Pattern:** {self.config_patterns.settings_pattern}\n"
+                parts.append(f"**Settings Pattern:** {self.config_patterns.settings_pattern}\n")
             if self.config_patterns.secrets_handling:
-                md += f"**Secrets Handling:** {self.config_patterns.secrets_handling}\n"
+                parts.append(f"**Secrets Handling:** {self.config_patterns.secrets_handling}\n")
             if self.config_patterns.config_validation:
-                md += "**Config Validation:** Yes (Pydantic/dynaconf)\n"
-            md += "\n"
+                parts.append("**Config Validation:** Yes (Pydantic/dynaconf)\n")
+            parts.append("\n")
         
         # Skip directories
         if self.skip_directories:
-            md += "## Skip Directories\n"
-            md += f"`{', '.join(self.skip_directories)}`\n\n"
+            parts.append("## Skip Directories\n")
+            parts.append(f"`{', '.join(self.skip_directories)}`\n\n")
         
         # Team rules (explicit conventions from CLAUDE.md, .cursorrules, etc.)
         if self.team_rules:
-            md += "## Team Rules\n"
+            parts.append("## Team Rules\n")
             if self.team_rules_source:
-                md += f"*Source: `{self.team_rules_source}`*\n\n"
-            md += self.team_rules
-            md += "\n"
+                parts.append(f"*Source: `{self.team_rules_source}`*\n\n")
+            parts.append(self.team_rules)
+            parts.append("\n")
         
-        return md
+        return "".join(parts)
+
+
+def _pool_context() -> multiprocessing.context.BaseContext:
+    """Start method for the analysis pool.
+
+    Not fork: this runs inside the API process, which has the log writer,
+    Sentry transport and anyio worker threads going, and forking while one
+    of them holds a lock can deadlock the child. forkserver forks workers
+    from a clean single-threaded server (spawn where that doesn't exist);
+    _analyze_chunk is module-level, so it pickles either way.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def _analyze_chunk(files: List[Path], max_file_size: int) -> Tuple[List[Optional[_PatternAccumulator]], Counter]:
+    """Worker entry point for parallel extraction (module-level so it pickles).
+
+    Returns one accumulator per file (None if it couldn't be read) so the
+    parent can cache them individually.
+    """
+    results = []
+    stats = Counter()
+    for file_path in files:
+        content, stat = _read_source(file_path, max_file_size)
+        stats[stat] += 1
+        facts = None
+        if content:
+            facts = _PatternAccumulator()
+            analyze_file(file_path, _scan_content(content), facts)
+        results.append(facts)
+    return results, stats
+
+
+class _FileFactsCache:
+    """Per-clone SQLite store of each file's analyzer output.
+
+    Rows are keyed by repo-relative path and only trusted while mtime and size
+    still match, same as the tree fingerprint. Lives under the clone's .git dir:
+    it's wiped with the clone, never shows up in the working tree, and can't be
+    shipped by the repo itself (the blobs are pickles, so that matters).
+    """
+    FILENAME = 'codeintel_dna_cache.sqlite'
+    # Bump when the analyzers or _PatternAccumulator change shape
+    VERSION = 5
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    @classmethod
+    def open(cls, repo_path: Path) -> Optional["_FileFactsCache"]:
+        git_dir = repo_path / '.git'
+        if not git_dir.is_dir():
+            return None
+        try:
+            conn = sqlite3.connect(git_dir / cls.FILENAME)
+            if conn.execute("PRAGMA user_version").fetchone()[0] != cls.VERSION:
+                conn.execute("DROP TABLE IF EXISTS dna")
+                conn.execute(f"PRAGMA user_version = {cls.VERSION}")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS dna "
+                "(path TEXT PRIMARY KEY, mtime INTEGER, size INTEGER, facts BLOB)"
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"DNA file cache unavailable: {e}")
+            return None
+        return cls(conn)
+
+    def load(self) -> Dict[str, Tuple[int, int, bytes]]:
+        rows = self.conn.execute("SELECT path, mtime, size, facts FROM dna")
+        return {path: (mtime, size, facts) for path, mtime, size, facts in rows}
+
+    def store(self, rows: List[Tuple[str, int, int, bytes]], stale: List[str]) -> None:
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO dna VALUES (?, ?, ?, ?)", rows)
+            self.conn.executemany("DELETE FROM dna WHERE path = ?", [(p,) for p in stale])
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def _read_head_sha(repo_path: Path) -> Optional[str]:
+    """Commit SHA checked out in repo_path, read straight from .git.
+
+    Two small file reads instead of a git subprocess. None when it can't be
+    resolved (not a git checkout, worktree .git file, unborn branch).
+    """
+    git_dir = repo_path / '.git'
+    try:
+        head = (git_dir / 'HEAD').read_text().strip()
+        if not head.startswith('ref: '):
+            return head or None  # detached HEAD
+        ref = head[5:]
+        try:
+            return (git_dir / ref).read_text().strip() or None
+        except FileNotFoundError:
+            pass
+        # fresh clones keep branch refs in packed-refs
+        with open(git_dir / 'packed-refs') as f:
+            for line in f:
+                sha, _, name = line.rstrip('\n').partition(' ')
+                if name == ref:
+                    return sha
+    except OSError:
+        pass
+    return None
 
 
 class DNAExtractor:
     """Extracts architectural DNA from a codebase"""
     
-    SKIP_DIRS = {'node_modules', '.git', '__pycache__', 'venv', 'env', 'dist', 'build', '.next', 'coverage', '.venv', 'site-packages'}
+    SKIP_DIRS = frozenset({'node_modules', '.git', '__pycache__', 'venv', 'env', 'dist', 'build', '.next', 'coverage', '.venv', 'site-packages'})
     MAX_FILE_SIZE = 1024 * 1024  # 1MB
     MAX_FILES = 5000
+    CACHE_BATCH_SIZE = 500  # rows per upsert in save_many_to_cache
+    # Below this many files, process startup costs more than it saves
+    PARALLEL_MIN_FILES = 200
+    PARALLEL_WORKERS = min(os.cpu_count() or 1, 8)
+    # Bump when extraction logic changes so fingerprints stop matching old cached DNA
+    FINGERPRINT_VERSION = "1"
     
     # Team rules files in priority order (first found wins)
     RULES_FILES = [
@@ -276,17 +478,35 @@ class DNAExtractor:
         'CODING_GUIDELINES.md',
     ]
     
+    # Repos whose rules files stay cached between extractions (LRU)
+    TEAM_RULES_CACHE_MAX_REPOS = 256
+    
     def __init__(self):
-        self.parsers = {
-            'python': Parser(Language(tspython.language())),
-            'javascript': Parser(Language(tsjavascript.language())),
-            'typescript': Parser(Language(tsjavascript.language())),
-        }
+        # tree-sitter parsers aren't thread-safe: one set per thread, built on first use
+        self._parsers_tls = threading.local()
+        # Extractions run in worker threads and share the per-run caches below
+        self._extract_lock = threading.Lock()
         self._supabase = None
-        self._file_cache: Dict[Path, str] = {}
-        self._stats = {'files_read': 0, 'files_skipped': 0, 'read_errors': 0}
+        self._file_cache: Dict[Path, Optional[str]] = {}
+        self._scan_cache: Dict[Path, Optional[_FileScan]] = {}
+        self._stat_cache: Dict[Path, Optional[os.stat_result]] = {}
+        self._stats = {'files_read': 0, 'files_skipped': 0, 'read_errors': 0, 'files_cached': 0}
+        # repo path -> {rules filename -> (mtime_ns, size, content)}, kept across runs
+        self._team_rules_cache: "OrderedDict[Path, Dict[str, Tuple[int, int, Optional[str]]]]" = OrderedDict()
         logger.info("DNAExtractor initialized")
     
+    @property
+    def parsers(self) -> Dict[str, Parser]:
+        """This thread's parser for each supported language"""
+        return {language: self._get_parser(language) for language in _LANGUAGES}
+    
+    def _get_parser(self, language: str) -> Optional[Parser]:
+        parser = getattr(self._parsers_tls, language, None)
+        if parser is None and language in _LANGUAGES:
+            parser = Parser(_LANGUAGES[language])
+            setattr(self._parsers_tls, language, parser)
+        return parser
+    
     @property
     def supabase(self):
         if self._supabase is None:
@@ -296,45 +516,46 @@ class DNAExtractor:
     def _reset_cache(self):
         """Clear file cache between extractions"""
         self._file_cache.clear()
-        self._stats = {'files_read': 0, 'files_skipped': 0, 'read_errors': 0}
+        self._scan_cache.clear()
+        self._stat_cache.clear()
+        self._stats = {'files_read': 0, 'files_skipped': 0, 'read_errors': 0, 'files_cached': 0}
     
     def _safe_read_file(self, file_path: Path) -> Optional[str]:
-        """Safely read file with caching, size limits, and error handling"""
+        """Safely read file with caching, size limits, and error handling.
+        
+        Every detector reads through here, so each file hits the disk once per
+        extraction. Misses are cached as None so skipped/unreadable files
+        aren't re-stat'd (and re-counted) by each detector.
+        """
         if file_path in self._file_cache:
             return self._file_cache[file_path]
         
-        try:
-            # size check
-            if file_path.stat().st_size > self.MAX_FILE_SIZE:
-                self._stats['files_skipped'] += 1
-                return None
-            
-            # read with fallback encodings
-            content = None
-            for encoding in ['utf-8', 'latin-1', 'cp1252']:
-                try:
-                    content = file_path.read_text(encoding=encoding)
-                    break
-                except UnicodeDecodeError:
-                    continue
-            
-            if content is None:
-                self._stats['read_errors'] += 1
-                return None
-            
-            # check for binary content (null bytes)
-            if '\x00' in content[:1024]:
-                self._stats['files_skipped'] += 1
-                return None
-            
-            self._file_cache[file_path] = content
-            self._stats['files_read'] += 1
-            return content
-            
-        except Exception as e:
-            logger.debug(f"Error reading {file_path}: {e}")
-            self._stats['read_errors'] += 1
-            return None
+        content, stat = _read_source(file_path, self.MAX_FILE_SIZE)
+        self._stats[stat] += 1
+        self._file_cache[file_path] = content
+        return content
+    
+    def _scan_file(self, file_path: Path) -> Optional[_FileScan]:
+        """Read a file and find every detector indicator in it, once per extraction.
+        
+        Returns None for files that are unreadable, skipped or empty.
+        """
+        if file_path in self._scan_cache:
+            return self._scan_cache[file_path]
+        
+        content = self._safe_read_file(file_path)
+        scan = _scan_content(content) if content else None
+        self._scan_cache[file_path] = scan
+        return scan
+    
+    def _stat_file(self, file_path: Path) -> Optional[os.stat_result]:
+        """stat() a file, reusing what the tree fingerprint already looked up"""
+        if file_path not in self._stat_cache:
+            try:
+                self._stat_cache[file_path] = file_path.stat()
+            except OSError:
+                self._stat_cache[file_path] = None
+        return self._stat_cache[file_path]
     
     def _extract_team_rules(self, repo_path: Path) -> tuple[Optional[str], Optional[str]]:
         """Extract team-defined rules from convention files.
@@ -342,24 +563,61 @@ class DNAExtractor:
         Returns:
             Tuple of (rules_content, source_filename) or (None, None) if not found.
         """
+        repo_rules = self._team_rules_cache.get(repo_path)
+        if repo_rules is None:
+            repo_rules = self._team_rules_cache[repo_path] = {}
+            if len(self._team_rules_cache) > self.TEAM_RULES_CACHE_MAX_REPOS:
+                self._team_rules_cache.popitem(last=False)
+        else:
+            self._team_rules_cache.move_to_end(repo_path)
+        
         for filename in self.RULES_FILES:
             rules_path = repo_path / filename
-            if rules_path.exists() and rules_path.is_file():
+            st = self._stat_file(rules_path)
+            if st is None or not S_ISREG(st.st_mode):
+                continue
+            # Rules files rarely change between extractions; reuse the last
+            # read while mtime and size match
+            cached = repo_rules.get(filename)
+            if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+                content = cached[2]
+            else:
                 content = self._safe_read_file(rules_path)
-                if content:
-                    logger.info(f"Found team rules in {filename}")
-                    return content.strip(), filename
+                repo_rules[filename] = (st.st_mtime_ns, st.st_size, content)
+            if content:
+                logger.info(f"Found team rules in {filename}")
+                return content.strip(), filename
         return None, None
     
-    def _detect_language(self, file_path: str) -> str:
-        ext = Path(file_path).suffix.lower()
-        return {
-            '.py': 'python',
-            '.js': 'javascript', 
-            '.jsx': 'javascript',
-            '.ts': 'typescript',
-            '.tsx': 'typescript',
-        }.get(ext, 'unknown')
+    def forget_repo(self, repo_path: str) -> None:
+        """Drop what's cached across extractions for a repo (call on delete)"""
+        self._team_rules_cache.pop(Path(repo_path), None)
+    
+    def _tree_fingerprint(self, repo_path: Path, files: List[Path]) -> str:
+        """Fingerprint the inputs of an extraction from path, mtime and size.
+        
+        Stat only, no reads. Also covers the repo-level files the extractors
+        probe directly rather than through `files` (rules files, settings.py,
+        test config); discovery skips non-code files, and include_paths can
+        leave settings.py out.
+        """
+        extras = [repo_path / name for name in (
+            *self.RULES_FILES, 'settings.py', '.coveragerc', 'pyproject.toml',
+        )]
+        entries = []
+        for path in [*files, *extras]:
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            self._stat_cache[path] = st  # reused by the file facts cache
+            entries.append(f"{path.relative_to(repo_path)}:{st.st_mtime_ns}:{st.st_size}")
+        
+        digest = hashlib.blake2b(self.FINGERPRINT_VERSION.encode(), digest_size=16)
+        for entry in sorted(entries):
+            digest.update(entry.encode())
+            digest.update(b'\0')
+        return digest.hexdigest()
     
     def _discover_files(self, repo_path: Path, include_paths: Optional[List[str]] = None) -> List[Path]:
         """Find all code files, skipping irrelevant directories and symlinks.
@@ -368,21 +626,15 @@ class DNAExtractor:
         """
         files = []
         extensions = {'.py', '.js', '.jsx', '.ts', '.tsx', '.sql'}
+        include_parts = [Path(p).parts for p in include_paths or []]
         
         try:
-            for item in repo_path.rglob('*'):
-                if item.is_symlink():
-                    continue
-                if not item.is_file() or item.suffix not in extensions:
+            for item in self._walk(repo_path):
+                if item.suffix not in extensions:
                     continue
-                if any(skip in item.parts for skip in self.SKIP_DIRS):
-                    continue
-                if include_paths:
+                if include_parts:
                     rel_parts = item.relative_to(repo_path).parts
-                    if not any(
-                        rel_parts[:len(Path(p).parts)] == Path(p).parts
-                        for p in include_paths
-                    ):
+                    if not any(rel_parts[:len(parts)] == parts for parts in include_parts):
                         continue
                 files.append(item)
                 if len(files) >= self.MAX_FILES:
@@ -392,409 +644,226 @@ class DNAExtractor:
             logger.error(f"Error discovering files: {e}")
         
         return files
-
-    def _detect_framework(self, files: List[Path]) -> Optional[str]:
-        """Detect the primary framework used in the codebase"""
-        framework_indicators = {
-            'fastapi': ['from fastapi', 'FastAPI()', 'APIRouter', 'fastapi.routing'],
-            'django-rest-framework': ['from rest_framework', 'rest_framework.views', 'APIView', 'ViewSet', 'serializers.Serializer'],
-            'django': ['from django', 'django.conf', 'INSTALLED_APPS', 'django.urls', 'django.views'],
-            'starlette': ['from starlette', 'Starlette()', 'starlette.routing'],
-            'flask': ['from flask', 'Flask(__name__)', '@app.route', 'flask.Blueprint'],
-            'aiohttp': ['from aiohttp', 'aiohttp.web', 'web.Application'],
-            'tornado': ['from tornado', 'tornado.web', 'RequestHandler'],
-            'express': ['require("express")', 'express()', 'app.use(', 'express.Router'],
-            'nextjs': ['from next', 'getServerSideProps', 'getStaticProps', 'next/router'],
-            'nestjs': ['@Module(', '@Injectable(', '@Controller(', 'NestFactory'],
-        }
+    
+    def _walk(self, root: Path):
+        """Yield regular files under root, pruning SKIP_DIRS before descending.
         
-        scores = Counter()
-        for file_path in files:
+        rglob('*') walks all of node_modules/.git and only then lets us filter,
+        which dominates discovery on JS-heavy repos. Same order as rglob: each
+        directory's files, then its subdirectories depth-first. Symlinks are
+        skipped; DirEntry type checks come from readdir, so no extra stats.
+        """
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            subdirs = []
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in self.SKIP_DIRS:
+                                subdirs.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            yield Path(entry.path)
+            except OSError:
+                continue  # unreadable dir, rglob skips these too
+            stack.extend(reversed(subdirs))
+
+    def _analyze_files(self, files: List[Path], repo_path: Path) -> _PatternAccumulator:
+        """Run every per-file analyzer over the repo in a single pass.
+
+        Each file is read and scanned once, then handed to all analyzers
+        while its content is still hot. Repo-level checks (conftest, config
+        files, file naming) and dedup happen once at the end.
+        """
+        acc = _PatternAccumulator()
+        for facts in self._file_facts(files, repo_path):
+            if facts is not None:
+                acc.merge(facts)
+
+        # dict.fromkeys dedups in first-seen order, so the DNA (and its
+        # markdown) come out the same on every run
+        acc.middleware = list(dict.fromkeys(acc.middleware))
+        acc.auth.middleware_used = list(dict.fromkeys(acc.auth.middleware_used))
+        acc.auth.auth_decorators = list(dict.fromkeys(acc.auth.auth_decorators))
+        acc.auth.ownership_checks = list(dict.fromkeys(acc.auth.ownership_checks))
+        acc.errors.exception_classes = list(dict.fromkeys(acc.errors.exception_classes))
+        acc.logging.log_levels_used = list(acc.log_levels)
+
+        # File naming
+        py_files = [f for f in files if f.suffix == '.py']
+        snake_files = sum(1 for f in py_files if '_' in f.stem and f.stem.islower())
+        if snake_files > len(py_files) * 0.5:
+            acc.naming.file_style = 'snake_case'
+        if acc.function_styles:
+            acc.naming.function_style = max(acc.function_styles, key=acc.function_styles.get)
+        if acc.class_styles:
+            acc.naming.class_style = max(acc.class_styles, key=acc.class_styles.get)
+        acc.naming.constant_style = 'UPPER_SNAKE_CASE'
+
+        # Check for conftest.py (pytest). Discovery already walked the tree,
+        # so look at what it found rather than rglob-ing the repo again
+        acc.tests.has_conftest = any(f.name == 'conftest.py' for f in py_files)
+        # Check for coverage config
+        if (repo_path / '.coveragerc').exists() or (repo_path / 'pyproject.toml').exists():
+            acc.tests.coverage_config = True
+
+        # Check for specific config files
+        if (repo_path / 'settings.py').exists():
+            acc.config.settings_pattern = 'Single settings file'
+        elif (repo_path / 'settings').is_dir():
+            acc.config.settings_pattern = 'Split settings (by environment)'
+        elif (repo_path / 'config').is_dir():
+            acc.config.settings_pattern = 'Config directory'
+
+        return acc
+
+    def _file_facts(self, files: List[Path], repo_path: Path) -> List[Optional[_PatternAccumulator]]:
+        """Per-file analyzer output, in file order.
+
+        Unchanged files (same mtime and size as last time) come from the
+        clone's file cache; only the rest are read and analyzed.
+        """
+        facts: List[Optional[_PatternAccumulator]] = [None] * len(files)
+        keys: List[Optional[Tuple[str, int, int]]] = [None] * len(files)
+        misses = []
+        cache = _FileFactsCache.open(repo_path)
+        cached = {}
+        if cache is not None:
             try:
-                content = file_path.read_text(encoding='utf-8', errors='ignore')
-                for framework, indicators in framework_indicators.items():
-                    for indicator in indicators:
-                        if indicator in content:
-                            scores[framework] += 1
-            except:
-                pass
+                cached = cache.load()
+            except sqlite3.Error as e:
+                logger.warning(f"DNA file cache unreadable, ignoring: {e}")
+        
+        for i, file_path in enumerate(files):
+            if cache is not None:
+                st = self._stat_file(file_path)
+                if st is None:
+                    misses.append(i)
+                    continue
+                rel = str(file_path.relative_to(repo_path))
+                keys[i] = (rel, st.st_mtime_ns, st.st_size)
+                row = cached.get(rel)
+                if row is not None and row[:2] == (st.st_mtime_ns, st.st_size):
+                    try:
+                        facts[i] = pickle.loads(row[2])
+                        self._stats['files_cached'] += 1
+                        continue
+                    except Exception:
+                        pass  # corrupt or from an older layout, just redo it
+            misses.append(i)
+        
+        miss_files = [files[i] for i in misses]
+        analyzed = None
+        if len(miss_files) >= self.PARALLEL_MIN_FILES and self.PARALLEL_WORKERS > 1:
+            analyzed = self._analyze_files_parallel(miss_files)
+        if analyzed is None:
+            analyzed = [self._analyze_one(file_path) for file_path in miss_files]
+        for i, result in zip(misses, analyzed):
+            facts[i] = result
+        
+        if cache is not None:
+            rows = [(*keys[i], pickle.dumps(facts[i])) for i in misses if keys[i] is not None]
+            # rows for files that are gone; a missing path outside `files`
+            # may just be filtered out by include_paths, so check the disk
+            seen = {key[0] for key in keys if key is not None}
+            stale = [rel for rel in cached if rel not in seen and not (repo_path / rel).exists()]
+            try:
+                cache.store(rows, stale)
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to update DNA file cache: {e}")
+            finally:
+                cache.close()
+        return facts
+    
+    def _analyze_one(self, file_path: Path) -> Optional[_PatternAccumulator]:
+        scan = self._scan_file(file_path)
+        if scan is None:
+            return None
+        facts = _PatternAccumulator()
+        analyze_file(file_path, scan, facts)
+        return facts
+
+    def _analyze_files_parallel(self, files: List[Path]) -> Optional[List[Optional[_PatternAccumulator]]]:
+        """Analyze contiguous chunks of files in worker processes.
         
+        Chunks come back in order, so the per-file results line up with
+        `files`. Returns None if the pool can't be used, and the caller
+        falls back to the serial loop.
+        """
+        workers = self.PARALLEL_WORKERS
+        # a few chunks per worker so one slow chunk doesn't stall the pool
+        chunk_size = max(50, -(-len(files) // (workers * 4)))
+        chunks = [files[i:i + chunk_size] for i in range(0, len(files), chunk_size)]
+        
+        try:
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(chunks)), mp_context=_pool_context()
+            ) as pool:
+                results = list(pool.map(
+                    _analyze_chunk, chunks, [self.MAX_FILE_SIZE] * len(chunks)
+                ))
+        except Exception as e:
+            logger.warning(f"Parallel DNA analysis failed, falling back to serial: {e}")
+            return None
+        
+        facts = []
+        for chunk_facts, chunk_stats in results:
+            facts.extend(chunk_facts)
+            for stat, count in chunk_stats.items():
+                self._stats[stat] += count
+        return facts
+    
+    @staticmethod
+    def _detect_framework(scores: Counter) -> Optional[str]:
+        """Pick the primary framework from the indicator scores"""
         if scores:
-            top_framework = scores.most_common(1)[0][0]
+            top_framework = max(scores, key=scores.get)
             # DRF is always used WITH Django, so note both
             if top_framework == 'django-rest-framework':
                 return 'django + DRF'
             return top_framework
         return None
 
-    def _extract_middleware_patterns(self, files: List[Path], framework: Optional[str]) -> List[str]:
-        """Extract middleware patterns based on framework"""
-        patterns = []
-        
-        for file_path in files:
-            try:
-                content = file_path.read_text(encoding='utf-8', errors='ignore')
-                
-                # Starlette/ASGI middleware
-                if 'class' in content and 'Middleware' in content:
-                    middlewares = re.findall(r'class\s+(\w*Middleware\w*)', content)
-                    patterns.extend(middlewares)
-                if 'Middleware(' in content:
-                    patterns.append('Middleware(cls)')
-                if 'app.add_middleware' in content:
-                    patterns.append('app.add_middleware()')
-                
-                # FastAPI Depends
-                if 'Depends(' in content:
-                    deps = re.findall(r'Depends\((\w+)\)', content)
-                    for dep in deps:
-                        patterns.append(f'Depends({dep})')
-                
-                # Django middleware
-                if 'MIDDLEWARE' in content and ('django' in content or '.middleware' in content):
-                    patterns.append('Django MIDDLEWARE setting')
-                if 'MiddlewareMixin' in content:
-                    patterns.append('MiddlewareMixin')
-                if 'process_request' in content or 'process_response' in content:
-                    patterns.append('Django middleware hooks')
-                
-                # DRF middleware/permissions
-                if 'permission_classes' in content:
-                    perms = re.findall(r'permission_classes\s*=\s*\[([^\]]+)\]', content)
-                    for perm in perms:
-                        patterns.append(f'DRF permission_classes: {perm.strip()}')
-                if 'authentication_classes' in content:
-                    patterns.append('DRF authentication_classes')
-                
-                # Express middleware
-                if 'app.use(' in content:
-                    patterns.append('app.use(middleware)')
-                
-                # Flask decorators
-                if '@app.before_request' in content:
-                    patterns.append('@app.before_request')
-                if '@app.after_request' in content:
-                    patterns.append('@app.after_request')
-                    
-            except:
-                pass
-        
-        return list(set(patterns))
+    @staticmethod
+    def _common_imports(import_counter: Counter) -> List[str]:
+        """Most common import lines across the repo"""
+        # Drop one-off imports before ranking -- usually the vast majority of
+        # distinct lines -- and stream the rest straight into the top-20 heap
+        # (same stable tie order as most_common, without a filtered copy)
+        repeated = (item for item in import_counter.items() if item[1] >= 2)
+        return [imp for imp, _ in heapq.nlargest(20, repeated, key=itemgetter(1))]
 
-    def _extract_auth_patterns(self, files: List[Path], repo_path: Path, framework: Optional[str] = None) -> AuthPattern:
-        """Extract authentication patterns from codebase"""
-        pattern = AuthPattern()
-        
-        for file_path in files:
-            if file_path.suffix != '.py':
-                continue
-                
-            try:
-                content = file_path.read_text(encoding='utf-8', errors='ignore')
-                
-                # FastAPI patterns
-                if 'require_auth' in content:
-                    pattern.middleware_used.append('require_auth')
-                if 'public_auth' in content:
-                    pattern.middleware_used.append('public_auth')
-                if 'Depends(' in content and 'auth' in content.lower():
-                    pattern.auth_decorators.append('Depends(require_auth)')
-                
-                # Starlette patterns
-                if 'AuthenticationMiddleware' in content:
-                    pattern.middleware_used.append('AuthenticationMiddleware')
-                if 'AuthCredentials' in content:
-                    pattern.auth_context_type = 'AuthCredentials'
-                if 'AuthenticationBackend' in content:
-                    pattern.middleware_used.append('AuthenticationBackend')
-                if 'requires(' in content:
-                    scopes = re.findall(r'requires\([\'"](\w+)[\'"]\)', content)
-                    for scope in scopes:
-                        pattern.auth_decorators.append(f'@requires("{scope}")')
-                
-                # Flask patterns
-                if 'login_required' in content:
-                    pattern.auth_decorators.append('@login_required')
-                if 'flask_login' in content:
-                    pattern.middleware_used.append('flask_login')
-                if 'current_user' in content:
-                    pattern.auth_context_type = 'current_user'
-                
-                # Django patterns
-                if '@login_required' in content:
-                    pattern.auth_decorators.append('@login_required')
-                if 'permission_required' in content:
-                    pattern.auth_decorators.append('@permission_required')
-                if 'request.user' in content:
-                    pattern.auth_context_type = 'request.user'
-                
-                # Detect ownership checks
-                if 'get_repo_or_404' in content:
-                    pattern.ownership_checks.append('get_repo_or_404(repo_id, auth.user_id)')
-                if 'verify_ownership' in content:
-                    pattern.ownership_checks.append('verify_ownership')
-                if 'user_id' in content and ('==' in content or '.filter(' in content):
-                    pattern.ownership_checks.append('user_id check')
-                
-                # Detect AuthContext
-                if 'AuthContext' in content:
-                    pattern.auth_context_type = 'AuthContext'
-                    
-            except Exception as e:
-                logger.debug(f"Error reading {file_path}: {e}")
-        
-        pattern.middleware_used = list(set(pattern.middleware_used))
-        pattern.auth_decorators = list(set(pattern.auth_decorators))
-        pattern.ownership_checks = list(set(pattern.ownership_checks))
-        return pattern
-    
     def _extract_service_patterns(self, files: List[Path], repo_path: Path) -> ServicePattern:
         """Extract service layer patterns"""
         pattern = ServicePattern()
         
         # Check for dependencies.py
         deps_file = repo_path / 'dependencies.py'
-        if deps_file.exists():
+        if deps_file in files:
             pattern.dependencies_file = 'dependencies.py'
-            try:
-                content = deps_file.read_text(encoding='utf-8', errors='ignore')
-                
+            content = self._safe_read_file(deps_file)
+            if content is not None:
                 # Find singleton instantiations
-                singleton_pattern = re.findall(r'^(\w+)\s*=\s*(\w+)\(\)', content, re.MULTILINE)
-                for var_name, class_name in singleton_pattern:
-                    pattern.singleton_services.append(f"{var_name} = {class_name}()")
+                pattern.singleton_services.extend(
+                    f"{var_name} = {class_name}()"
+                    for var_name, class_name in _RE_SINGLETON.findall(content)
+                )
                 
                 pattern.injection_pattern = "Singleton in dependencies.py"
-            except Exception as e:
-                logger.debug(f"Error reading dependencies.py: {e}")
         
         # Check services directory structure
-        services_dir = repo_path / 'services'
-        if services_dir.exists():
-            for service_file in services_dir.glob('*.py'):
-                if service_file.name.startswith('_'):
-                    continue
-                try:
-                    content = service_file.read_text(encoding='utf-8', errors='ignore')
-                    classes = re.findall(r'^class\s+(\w+)', content, re.MULTILINE)
-                    pattern.service_base_classes.extend(classes)
-                except:
-                    pass
-        
-        return pattern
-    
-    def _extract_database_patterns(self, files: List[Path], repo_path: Path) -> DatabasePattern:
-        """Extract database patterns from migrations and code"""
-        pattern = DatabasePattern()
-        
-        for file_path in files:
-            try:
-                content = file_path.read_text(encoding='utf-8', errors='ignore')
-                
-                # Check for Supabase
-                if 'supabase' in content.lower() and not pattern.orm_used:
-                    pattern.orm_used = 'Supabase'
-                
-                # Check for Django ORM
-                if 'from django.db import models' in content or 'models.Model' in content:
-                    pattern.orm_used = 'Django ORM'
-                    if 'models.UUIDField' in content:
-                        pattern.id_type = 'UUID (Django UUIDField)'
-                    elif 'models.AutoField' in content or 'models.BigAutoField' in content:
-                        pattern.id_type = 'AutoField (Django)'
-                    if 'models.DateTimeField' in content:
-                        pattern.timestamp_type = 'DateTimeField (Django)'
-                    if 'on_delete=models.CASCADE' in content:
-                        pattern.cascade_deletes = True
-                
-                # Check for SQLAlchemy
-                if 'from sqlalchemy' in content or 'sqlalchemy' in content:
-                    pattern.orm_used = 'SQLAlchemy'
-                    if 'UUID' in content:
-                        pattern.id_type = 'UUID (SQLAlchemy)'
-                    if 'DateTime' in content:
-                        pattern.timestamp_type = 'DateTime (SQLAlchemy)'
-                
-                # Check for Prisma (JS/TS)
-                if 'prisma' in content.lower() or '@prisma/client' in content:
-                    pattern.orm_used = 'Prisma'
-                
-                # Check for Tortoise ORM
-                if 'from tortoise' in content or 'tortoise.models' in content:
-                    pattern.orm_used = 'Tortoise ORM'
-                    
-                # Check SQL files for patterns
-                if file_path.suffix == '.sql':
-                    if 'gen_random_uuid()' in content:
-                        pattern.id_type = 'UUID (gen_random_uuid())'
-                    elif 'SERIAL' in content:
-                        pattern.id_type = 'SERIAL'
-                    
-                    if 'TIMESTAMPTZ' in content:
-                        pattern.timestamp_type = 'TIMESTAMPTZ'
-                    elif 'TIMESTAMP' in content:
-                        pattern.timestamp_type = 'TIMESTAMP'
-                    
-                    if 'ENABLE ROW LEVEL SECURITY' in content:
-                        pattern.has_rls = True
-                    
-                    if 'ON DELETE CASCADE' in content:
-                        pattern.cascade_deletes = True
-                
-                # Check Python for connection patterns
-                if file_path.suffix == '.py':
-                    if 'get_supabase_service()' in content:
-                        pattern.connection_pattern = 'Singleton: get_supabase_service()'
-                    elif 'create_client(' in content:
-                        pattern.connection_pattern = 'Direct: create_client()'
-                    elif 'DATABASES' in content and 'django' in content.lower():
-                        pattern.connection_pattern = 'Django DATABASES setting'
-                    elif 'create_engine(' in content:
-                        pattern.connection_pattern = 'SQLAlchemy: create_engine()'
-                        
-            except Exception as e:
-                logger.debug(f"Error reading {file_path}: {e}")
-        
-        return pattern
-    
-    def _extract_error_patterns(self, files: List[Path]) -> ErrorPattern:
-        """Extract error handling patterns"""
-        pattern = ErrorPattern()
-        
-        for file_path in files:
-            if file_path.suffix != '.py':
+        for service_file in _files_in(files, repo_path / 'services'):
+            if service_file.name.startswith('_'):
                 continue
-            
-            try:
-                content = file_path.read_text(encoding='utf-8', errors='ignore')
-                
-                if 'HTTPException' in content:
-                    pattern.http_exception_usage = True
-                    
-                if 'logger.error' in content and ('except' in content or 'Exception' in content):
-                    pattern.logging_on_error = True
-                
-                # Find custom exception classes
-                custom_exceptions = re.findall(r'class\s+(\w*(?:Error|Exception)\w*)', content)
-                pattern.exception_classes.extend(custom_exceptions)
-                
-            except Exception as e:
-                logger.debug(f"Error reading {file_path}: {e}")
-        
-        pattern.exception_classes = list(set(pattern.exception_classes))
-        return pattern
-    
-    def _extract_logging_patterns(self, files: List[Path]) -> LoggingPattern:
-        """Extract logging patterns"""
-        pattern = LoggingPattern()
-        log_levels = set()
-        
-        for file_path in files:
-            if file_path.suffix != '.py':
-                continue
-            
-            content = self._safe_read_file(file_path)
+            content = self._safe_read_file(service_file)
             if not content:
                 continue
-            
-            # Detect logger import/setup
-            if 'from services.observability import logger' in content:
-                pattern.logger_import = 'from services.observability import logger'
-                pattern.structured_logging = True
-            elif 'logging.getLogger' in content:
-                pattern.logger_import = 'logging.getLogger(__name__)'
-            elif 'import logging' in content and not pattern.logger_import:
-                pattern.logger_import = 'import logging'
-            
-            # Detect log levels (both logger.X and logging.X)
-            for level in ['debug', 'info', 'warning', 'error', 'critical']:
-                if f'logger.{level}' in content or f'logging.{level}' in content or f'.{level}(' in content:
-                    log_levels.add(level)
-            
-            # Detect metrics
-            if 'metrics.increment' in content or 'metrics.gauge' in content:
-                pattern.metrics_tracking = True
-            
-            # Detect structlog
-            if 'structlog' in content:
-                pattern.structured_logging = True
-                pattern.logger_import = 'structlog'
+            classes = _RE_CLASSDEF.findall(content)
+            pattern.service_base_classes.extend(classes)
         
-        pattern.log_levels_used = list(log_levels)
         return pattern
     
-    def _extract_naming_conventions(self, files: List[Path]) -> NamingConventions:
-        """Extract naming conventions from code"""
-        conventions = NamingConventions()
-        
-        function_styles = Counter()
-        class_styles = Counter()
-        
-        for file_path in files:
-            if file_path.suffix != '.py':
-                continue
-            
-            try:
-                content = file_path.read_text(encoding='utf-8', errors='ignore')
-                
-                # Extract function names
-                functions = re.findall(r'def\s+(\w+)\s*\(', content)
-                for func in functions:
-                    if func.startswith('_'):
-                        continue
-                    if '_' in func:
-                        function_styles['snake_case'] += 1
-                    elif func[0].islower() and any(c.isupper() for c in func):
-                        function_styles['camelCase'] += 1
-                
-                # Extract class names
-                classes = re.findall(r'class\s+(\w+)', content)
-                for cls in classes:
-                    if cls[0].isupper() and '_' not in cls:
-                        class_styles['PascalCase'] += 1
-                        
-            except:
-                pass
-        
-        # File naming
-        py_files = [f for f in files if f.suffix == '.py']
-        snake_files = sum(1 for f in py_files if '_' in f.stem and f.stem.islower())
-        if snake_files > len(py_files) * 0.5:
-            conventions.file_style = 'snake_case'
-        
-        if function_styles:
-            conventions.function_style = function_styles.most_common(1)[0][0]
-        if class_styles:
-            conventions.class_style = class_styles.most_common(1)[0][0]
-        
-        conventions.constant_style = 'UPPER_SNAKE_CASE'
-        
-        return conventions
-    
-    def _extract_common_imports(self, files: List[Path]) -> List[str]:
-        """Extract most common import patterns"""
-        import_counter = Counter()
-        
-        for file_path in files:
-            if file_path.suffix != '.py':
-                continue
-            
-            try:
-                content = file_path.read_text(encoding='utf-8', errors='ignore')
-                
-                # Find all imports
-                imports = re.findall(r'^(?:from\s+[\w.]+\s+)?import\s+.+$', content, re.MULTILINE)
-                for imp in imports:
-                    imp = imp.strip()
-                    if imp and not imp.startswith('#'):
-                        import_counter[imp] += 1
-                        
-            except:
-                pass
-        
-        # Return most common imports
-        return [imp for imp, count in import_counter.most_common(20) if count >= 2]
-    
     def _extract_api_patterns(self, files: List[Path], repo_path: Path) -> tuple:
         """Extract API versioning and router patterns"""
         api_versioning = None
@@ -802,137 +871,50 @@ class DNAExtractor:
         
         # Check config for API versioning
         config_file = repo_path / 'config' / 'api.py'
-        if config_file.exists():
-            try:
-                content = config_file.read_text(encoding='utf-8', errors='ignore')
-                if 'API_PREFIX' in content or 'API_VERSION' in content:
-                    api_versioning = '/api/v1 (from config/api.py)'
-            except:
-                pass
+        if config_file in files:
+            content = self._safe_read_file(config_file)
+            if content and ('API_PREFIX' in content or 'API_VERSION' in content):
+                api_versioning = '/api/v1 (from config/api.py)'
         
         # Check for router patterns in routes
-        routes_dir = repo_path / 'routes'
-        if routes_dir.exists():
-            for route_file in routes_dir.glob('*.py'):
-                try:
-                    content = route_file.read_text(encoding='utf-8', errors='ignore')
-                    if 'APIRouter(' in content:
-                        match = re.search(r'APIRouter\(prefix=["\']([^"\']+)["\']', content)
-                        if match:
-                            router_pattern = f'APIRouter(prefix="{match.group(1)}", tags=[...])'
-                            break
-                except:
-                    pass
+        for route_file in _files_in(files, repo_path / 'routes'):
+            content = self._safe_read_file(route_file)
+            if not content:
+                continue
+            if 'APIRouter(' in content:
+                match = _RE_ROUTER_PREFIX.search(content)
+                if match:
+                    router_pattern = f'APIRouter(prefix="{match.group(1)}", tags=[...])'
+                    break
         
         return api_versioning, router_pattern
 
-    def _extract_test_patterns(self, files: List[Path], repo_path: Path) -> TestPattern:
-        """Extract testing patterns from codebase"""
-        pattern = TestPattern()
-        
-        # Check for conftest.py (pytest)
-        conftest_files = list(repo_path.rglob('conftest.py'))
-        pattern.has_conftest = len(conftest_files) > 0
-        
-        for file_path in files:
-            try:
-                content = file_path.read_text(encoding='utf-8', errors='ignore')
-                
-                # Detect test framework
-                if 'import pytest' in content or '@pytest' in content:
-                    pattern.framework = 'pytest'
-                    if '@pytest.fixture' in content:
-                        pattern.fixture_style = 'pytest fixtures'
-                elif 'from unittest' in content or 'import unittest' in content:
-                    if not pattern.framework:
-                        pattern.framework = 'unittest'
-                    if 'def setUp(' in content or 'def tearDown(' in content:
-                        pattern.fixture_style = 'setUp/tearDown'
-                elif 'from django.test' in content:
-                    pattern.framework = 'django.test'
-                    pattern.fixture_style = 'Django TestCase'
-                
-                # Detect mock library
-                if 'from unittest.mock import' in content or 'from unittest import mock' in content:
-                    pattern.mock_library = 'unittest.mock'
-                elif 'import responses' in content:
-                    pattern.mock_library = 'responses'
-                elif 'pytest_mock' in content or 'mocker' in content:
-                    pattern.mock_library = 'pytest-mock'
-                elif '@patch(' in content:
-                    pattern.mock_library = 'unittest.mock (decorator)'
-                
-                # Detect factories
-                if 'factory_boy' in content or 'factory.Factory' in content:
-                    pattern.has_factories = True
-                if 'from faker import' in content:
-                    pattern.has_factories = True
-                    
-            except:
-                pass
-        
-        # Check for coverage config
-        if (repo_path / '.coveragerc').exists() or (repo_path / 'pyproject.toml').exists():
-            pattern.coverage_config = True
-        
-        return pattern
-
-    def _extract_config_patterns(self, files: List[Path], repo_path: Path) -> ConfigPattern:
-        """Extract configuration patterns from codebase"""
-        pattern = ConfigPattern()
-        
-        for file_path in files:
-            try:
-                content = file_path.read_text(encoding='utf-8', errors='ignore')
-                
-                # Detect env loading
-                if 'from dotenv import' in content or 'load_dotenv' in content:
-                    pattern.env_loading = 'python-dotenv'
-                elif 'from environs import' in content:
-                    pattern.env_loading = 'environs'
-                elif 'import environ' in content or 'django-environ' in content:
-                    pattern.env_loading = 'django-environ'
-                elif 'from decouple import' in content:
-                    pattern.env_loading = 'python-decouple'
-                
-                # Detect settings pattern
-                if 'pydantic' in content and ('BaseSettings' in content or 'BaseModel' in content):
-                    pattern.settings_pattern = 'Pydantic Settings'
-                    pattern.config_validation = True
-                elif 'dynaconf' in content:
-                    pattern.settings_pattern = 'Dynaconf'
-                    pattern.config_validation = True
-                elif 'DJANGO_SETTINGS_MODULE' in content:
-                    pattern.settings_pattern = 'Django settings'
-                
-                # Detect secrets handling
-                if 'boto3' in content and 'secretsmanager' in content:
-                    pattern.secrets_handling = 'AWS Secrets Manager'
-                elif 'hvac' in content or 'vault' in content.lower():
-                    pattern.secrets_handling = 'HashiCorp Vault'
-                elif 'os.getenv(' in content or 'os.environ' in content:
-                    pattern.secrets_handling = 'Environment variables'
-                    
-            except:
-                pass
-        
-        # Check for specific config files
-        if (repo_path / 'settings.py').exists():
-            pattern.settings_pattern = 'Single settings file'
-        elif (repo_path / 'settings').is_dir():
-            pattern.settings_pattern = 'Split settings (by environment)'
-        elif (repo_path / 'config').is_dir():
-            pattern.settings_pattern = 'Config directory'
-        
-        return pattern
-
-    def extract_dna(self, repo_path: str, repo_id: str, include_paths: Optional[List[str]] = None) -> CodebaseDNA:
+    def extract_dna(
+        self,
+        repo_path: str,
+        repo_id: str,
+        include_paths: Optional[List[str]] = None,
+        cached: Optional[CodebaseDNA] = None,
+    ) -> CodebaseDNA:
         """Extract complete DNA profile from a codebase.
         
         If include_paths is set, only files within those directories are analyzed.
+        If `cached` (the last saved DNA) was extracted from the same git HEAD, or
+        failing that from a tree with the same fingerprint, it is reused without
+        analyzing any files.
         """
+        with self._extract_lock:
+            return self._extract_dna(repo_path, repo_id, include_paths, cached)
+    
+    def _extract_dna(
+        self,
+        repo_path: str,
+        repo_id: str,
+        include_paths: Optional[List[str]],
+        cached: Optional[CodebaseDNA],
+    ) -> CodebaseDNA:
         import time
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         repo_path = Path(repo_path)
         
@@ -956,6 +938,16 @@ class DNAExtractor:
                 cleaned.append(p)
             include_paths = cleaned or None
         
+        # Clones only change through git, so an unchanged HEAD means an
+        # unchanged tree -- checked before paying for a walk + stat of every file
+        head_sha = _read_head_sha(repo_path)
+        source_ref = None
+        if head_sha is not None:
+            source_ref = f"{self.FINGERPRINT_VERSION}:{head_sha}:{','.join(sorted(include_paths or []))}"
+            if cached is not None and cached.source_ref == source_ref:
+                logger.info("HEAD unchanged, reusing cached DNA", repo_id=repo_id)
+                return cached
+        
         # reset cache for fresh extraction
         self._reset_cache()
         
@@ -965,28 +957,29 @@ class DNAExtractor:
         files = self._discover_files(repo_path, include_paths=include_paths)
         logger.info(f"Found {len(files)} code files")
         
-        # Detect framework first
-        detected_framework = self._detect_framework(files)
+        # Nothing changed since the cached extraction -> skip the whole scan
+        tree_hash = self._tree_fingerprint(repo_path, files)
+        if cached is not None and cached.tree_hash == tree_hash:
+            logger.info("Codebase unchanged, reusing cached DNA", repo_id=repo_id)
+            if cached.source_ref != source_ref:
+                # Same files, new ref (or a row from before source_ref):
+                # record it so the next check is the cheap one
+                return replace(cached, source_ref=source_ref)
+            return cached
+        
+        # One pass over every file feeds all the per-file analyzers
+        acc = self._analyze_files(files, repo_path)
+        detected_framework = self._detect_framework(acc.framework_scores)
         logger.info(f"Detected framework: {detected_framework}")
         
         # Language distribution
         lang_dist = Counter()
         for f in files:
-            lang = self._detect_language(str(f))
-            if lang != 'unknown':
+            lang = _LANGUAGE_BY_SUFFIX.get(f.suffix.lower())
+            if lang is not None:
                 lang_dist[lang] += 1
         
-        # Extract all patterns (pass framework where needed)
-        auth_patterns = self._extract_auth_patterns(files, repo_path, detected_framework)
-        middleware_patterns = self._extract_middleware_patterns(files, detected_framework)
         service_patterns = self._extract_service_patterns(files, repo_path)
-        database_patterns = self._extract_database_patterns(files, repo_path)
-        error_patterns = self._extract_error_patterns(files)
-        logging_patterns = self._extract_logging_patterns(files)
-        naming_conventions = self._extract_naming_conventions(files)
-        test_patterns = self._extract_test_patterns(files, repo_path)
-        config_patterns = self._extract_config_patterns(files, repo_path)
-        common_imports = self._extract_common_imports(files)
         api_versioning, router_pattern = self._extract_api_patterns(files, repo_path)
         team_rules, team_rules_source = self._extract_team_rules(repo_path)
         
@@ -994,45 +987,50 @@ class DNAExtractor:
             repo_id=repo_id,
             detected_framework=detected_framework,
             language_distribution=dict(lang_dist),
-            auth_patterns=auth_patterns,
+            auth_patterns=acc.auth,
             service_patterns=service_patterns,
-            database_patterns=database_patterns,
-            error_patterns=error_patterns,
-            logging_patterns=logging_patterns,
-            naming_conventions=naming_conventions,
-            test_patterns=test_patterns,
-            config_patterns=config_patterns,
-            middleware_patterns=middleware_patterns,
-            common_imports=common_imports,
-            skip_directories=list(self.SKIP_DIRS),
+            database_patterns=acc.database,
+            error_patterns=acc.errors,
+            logging_patterns=acc.logging,
+            naming_conventions=acc.naming,
+            test_patterns=acc.tests,
+            config_patterns=acc.config,
+            middleware_patterns=acc.middleware,
+            common_imports=self._common_imports(acc.imports),
+            skip_directories=sorted(self.SKIP_DIRS),
             api_versioning=api_versioning,
             router_pattern=router_pattern,
             team_rules=team_rules,
             team_rules_source=team_rules_source,
+            tree_hash=tree_hash,
+            source_ref=source_ref,
         )
         
-        elapsed = time.time() - start_time
+        elapsed = time.perf_counter() - start_time
         logger.info(
             "DNA extraction complete",
             repo_id=repo_id,
             duration_sec=round(elapsed, 2),
             files_read=self._stats['files_read'],
             files_skipped=self._stats['files_skipped'],
-            read_errors=self._stats['read_errors']
+            read_errors=self._stats['read_errors'],
+            files_cached=self._stats['files_cached']
         )
         return dna
     
+    @staticmethod
+    def _cache_row(repo_id: str, dna: CodebaseDNA) -> Dict:
+        """Row for repository_insights; DNA lives in the architecture_patterns JSONB column"""
+        return {
+            'repo_id': repo_id,
+            'architecture_patterns': {'codebase_dna': dna.to_dict()},
+        }
+    
     def save_to_cache(self, repo_id: str, dna: CodebaseDNA) -> bool:
         """Save DNA to database cache using architecture_patterns column"""
         try:
-            # Store DNA in the architecture_patterns JSONB column
-            dna_data = {'codebase_dna': dna.to_dict()}
-            
             self.supabase.client.table('repository_insights').upsert(
-                {
-                    'repo_id': repo_id,
-                    'architecture_patterns': dna_data,
-                },
+                self._cache_row(repo_id, dna),
                 on_conflict='repo_id'
             ).execute()
             
@@ -1042,6 +1040,28 @@ class DNAExtractor:
             logger.error("Failed to save DNA to cache", error=str(e))
             return False
     
+    def save_many_to_cache(self, items: List[Tuple[str, CodebaseDNA]]) -> bool:
+        """Save several DNA profiles with one upsert per batch instead of one per repo.
+        
+        Batches are capped at CACHE_BATCH_SIZE rows to stay under Supabase payload limits.
+        """
+        rows = [self._cache_row(repo_id, dna) for repo_id, dna in items]
+        if not rows:
+            return True
+        
+        try:
+            for start in range(0, len(rows), self.CACHE_BATCH_SIZE):
+                self.supabase.client.table('repository_insights').upsert(
+                    rows[start:start + self.CACHE_BATCH_SIZE],
+                    on_conflict='repo_id'
+                ).execute()
+            
+            logger.info("DNA batch saved to cache", count=len(rows))
+            return True
+        except Exception as e:
+            logger.error("Failed to batch save DNA to cache", error=str(e), count=len(rows))
+            return False
+    
     def load_from_cache(self, repo_id: str) -> Optional[CodebaseDNA]:
         """Load DNA from database cache"""
         try:
@@ -1056,27 +1076,7 @@ class DNAExtractor:
                 if not data:
                     return None
                 
-                # Reconstruct CodebaseDNA from dict
-                dna = CodebaseDNA(
-                    repo_id=data['repo_id'],
-                    detected_framework=data.get('detected_framework'),
-                    language_distribution=data.get('language_distribution', {}),
-                    auth_patterns=AuthPattern(**data.get('auth_patterns', {})),
-                    service_patterns=ServicePattern(**data.get('service_patterns', {})),
-                    database_patterns=DatabasePattern(**data.get('database_patterns', {})),
-                    error_patterns=ErrorPattern(**data.get('error_patterns', {})),
-                    logging_patterns=LoggingPattern(**data.get('logging_patterns', {})),
-                    naming_conventions=NamingConventions(**data.get('naming_conventions', {})),
-                    test_patterns=TestPattern(**data.get('test_patterns', {})),
-                    config_patterns=ConfigPattern(**data.get('config_patterns', {})),
-                    middleware_patterns=data.get('middleware_patterns', []),
-                    common_imports=data.get('common_imports', []),
-                    skip_directories=data.get('skip_directories', []),
-                    api_versioning=data.get('api_versioning'),
-                    router_pattern=data.get('router_pattern'),
-                    team_rules=data.get('team_rules'),
-                    team_rules_source=data.get('team_rules_source'),
-                )
+                dna = CodebaseDNA.from_dict(data)
                 logger.debug("DNA loaded from cache", repo_id=repo_id)
                 return dna
         except Exception as e:
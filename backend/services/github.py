@@ -2,15 +2,126 @@
 GitHub API Service
 Handles fetching user repositories and validating tokens
 """
+import asyncio
+import hashlib
+import re
+import time
 import httpx
+from collections import OrderedDict
 from typing import Optional
 from dataclasses import dataclass
 from services.observability import logger
 
+try:
+    import orjson
+except ModuleNotFoundError:
+    orjson = None
+
+try:
+    import h2  # noqa: F401  (httpx needs it for HTTP/2)
+    _HTTP2 = True
+except ModuleNotFoundError:
+    _HTTP2 = False
+
 GITHUB_API_BASE = "https://api.github.com"
 
+# GitHub paginates via the Link header; rel="last" carries the final page number
+_LAST_PAGE_RE = re.compile(r'[?&]page=(\d+)[^>]*>;\s*rel="last"')
+# Pages fetched in flight at once after page 1 -- GitHub's secondary rate
+# limits kick in quickly on bursts of concurrent requests
+MAX_CONCURRENT_PAGES = 5
+
+# One pooled client for every GitHubService call. Services are built per
+# request, so a client per call/instance meant a fresh TCP+TLS handshake to
+# api.github.com every time. The token travels in per-call headers, so
+# sharing the pool across users is safe.
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    """Get the shared GitHub API client, creating it on first use"""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    # Pooled connections are tied to the loop that opened them
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        if _client is not None and not _client.is_closed:
+            _retire_client(_client, _client_loop)
+        _client = httpx.AsyncClient(
+            base_url=GITHUB_API_BASE,
+            headers={
+                "Accept": "application/vnd.github+json",
+                "X-GitHub-Api-Version": "2022-11-28"
+            },
+            http2=_HTTP2,
+            timeout=30.0,
+            # httpx drops idle connections after 5s by default, shorter than
+            # the gap between a user's clicks in the repo picker
+            limits=httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=20,
+                keepalive_expiry=300
+            )
+        )
+        _client_loop = loop
+    return _client
+
+
+# Closes of clients replaced after a loop change; held so they aren't GC'd mid-close
+_retiring: set = set()
+
+
+def _retire_client(client: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+    """Close a client that belongs to another event loop without blocking this one"""
+    if loop is not None and loop.is_running() and not loop.is_closed():
+        # Its loop is alive on another thread; close the pool there
+        asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        return
+    # Its loop is gone, so close from this one. Sockets bound to the dead
+    # loop may refuse a clean close; the pool is dropped either way
+    task = asyncio.get_running_loop().create_task(_aclose_quietly(client))
+    _retiring.add(task)
+    task.add_done_callback(_retiring.discard)
+
+
+async def _aclose_quietly(client: httpx.AsyncClient) -> None:
+    try:
+        await client.aclose()
+    except Exception as e:
+        logger.debug("Stale GitHub client close failed", error=str(e))
+
 
-@dataclass
+# key -> (expires_at, repos, last_page); oldest-used first for eviction
+_repo_cache: "OrderedDict[str, tuple[float, tuple[GitHubRepo, ...], Optional[int]]]" = OrderedDict()
+
+
+def _repo_cache_key(token: str, *parts) -> str:
+    token_hash = hashlib.sha256(token.encode()).hexdigest()[:16]
+    return ":".join(["repos", token_hash, *map(str, parts)])
+
+
+def clear_repo_cache() -> None:
+    """Drop every cached repo listing"""
+    _repo_cache.clear()
+
+
+async def close_github_client() -> None:
+    """Close the shared client (app shutdown)"""
+    global _client, _client_loop
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
+
+# Repo listings barely change minute to minute, but the picker refetches
+# them every time it opens. Pages are cached in-process for a short TTL,
+# keyed by a hash of the token (never the token itself). A revoked or
+# replaced token just stops being asked for, so entries age out on their own.
+REPO_CACHE_TTL_SECONDS = 120
+REPO_CACHE_MAX_ENTRIES = 1000
+
+
+@dataclass(slots=True)
 class GitHubRepo:
     id: int
     name: str
@@ -29,7 +140,7 @@ class GitHubRepo:
     owner_avatar: str
 
 
-@dataclass
+@dataclass(slots=True)
 class GitHubUser:
     login: str
     id: int
@@ -42,43 +153,38 @@ class GitHubService:
 
     def __init__(self, access_token: str):
         self.token = access_token
-        self.headers = {
-            "Authorization": f"Bearer {access_token}",
-            "Accept": "application/vnd.github+json",
-            "X-GitHub-Api-Version": "2022-11-28"
-        }
+        # Accept/API version live on the shared client; only auth is per-user
+        self.headers = {"Authorization": f"Bearer {access_token}"}
 
     async def validate_token(self) -> bool:
         """Check if the token is valid by fetching user info"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{GITHUB_API_BASE}/user",
-                    headers=self.headers,
-                    timeout=10.0
-                )
-                return response.status_code == 200
+            response = await _get_client().get(
+                "/user",
+                headers=self.headers,
+                timeout=10.0
+            )
+            return response.status_code == 200
         except Exception:
             return False
 
     async def get_user(self) -> Optional[GitHubUser]:
         """Get authenticated user info"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{GITHUB_API_BASE}/user",
-                    headers=self.headers,
-                    timeout=10.0
-                )
-                if response.status_code != 200:
-                    return None
-                data = response.json()
-                return GitHubUser(
-                    login=data.get("login", ""),
-                    id=data.get("id", 0),
-                    avatar_url=data.get("avatar_url"),
-                    name=data.get("name")
-                )
+            response = await _get_client().get(
+                "/user",
+                headers=self.headers,
+                timeout=10.0
+            )
+            if response.status_code != 200:
+                return None
+            data = response.json()
+            return GitHubUser(
+                login=data.get("login", ""),
+                id=data.get("id", 0),
+                avatar_url=data.get("avatar_url"),
+                name=data.get("name")
+            )
         except (httpx.RequestError, httpx.TimeoutException, KeyError, ValueError) as e:
             logger.error("Failed to fetch GitHub user", error=str(e))
             return None
@@ -98,52 +204,83 @@ class GitHubService:
         
         Raises exceptions on failure so callers can distinguish errors from empty results.
         """
+        repos, _ = await self._fetch_repos_page(
+            _get_client(), include_forks, include_private, per_page, page
+        )
+        return repos
+
+    async def _fetch_repos_page(
+        self,
+        client: httpx.AsyncClient,
+        include_forks: bool,
+        include_private: bool,
+        per_page: int,
+        page: int
+    ) -> tuple[list[GitHubRepo], Optional[int]]:
+        """One page of /user/repos plus the last page number from the Link header.
+
+        The last page is None when GitHub didn't send rel="last", i.e. this
+        is the only (or final) page. Successful pages are served from the
+        short-lived repo cache when possible.
+        """
+        key = _repo_cache_key(self.token, include_forks, include_private, per_page, page)
+        cached = _repo_cache.get(key)
+        if cached is not None:
+            expires_at, repos, last_page = cached
+            if expires_at > time.monotonic():
+                _repo_cache.move_to_end(key)
+                return list(repos), last_page
+            del _repo_cache[key]
+
         try:
-            async with httpx.AsyncClient() as client:
-                params = {
-                    "visibility": "all" if include_private else "public",
-                    "affiliation": "owner,organization_member",
-                    "sort": "updated",
-                    "direction": "desc",
-                    "per_page": per_page,
-                    "page": page
-                }
-                response = await client.get(
-                    f"{GITHUB_API_BASE}/user/repos",
-                    headers=self.headers,
-                    params=params,
-                    timeout=30.0
+            params = {
+                "visibility": "all" if include_private else "public",
+                "affiliation": "owner,organization_member",
+                "sort": "updated",
+                "direction": "desc",
+                "per_page": per_page,
+                "page": page
+            }
+            response = await client.get(
+                "/user/repos",
+                headers=self.headers,
+                params=params,
+                timeout=30.0
+            )
+            if response.status_code != 200:
+                logger.error(
+                    "GitHub API error fetching repos",
+                    status_code=response.status_code,
+                    page=page
                 )
-                if response.status_code != 200:
-                    logger.error(
-                        "GitHub API error fetching repos",
-                        status_code=response.status_code,
-                        page=page
-                    )
-                    raise RuntimeError(f"GitHub API error: {response.status_code}")
-
-                repos = []
-                for repo in response.json():
-                    if not include_forks and repo.get("fork", False):
-                        continue
-                    repos.append(GitHubRepo(
-                        id=repo.get("id", 0),
-                        name=repo.get("name", ""),
-                        full_name=repo.get("full_name", ""),
-                        description=repo.get("description"),
-                        html_url=repo.get("html_url", ""),
-                        clone_url=repo.get("clone_url", ""),
-                        ssh_url=repo.get("ssh_url", ""),
-                        default_branch=repo.get("default_branch", "main"),
-                        private=repo.get("private", False),
-                        fork=repo.get("fork", False),
-                        stargazers_count=repo.get("stargazers_count", 0),
-                        language=repo.get("language"),
-                        size=repo.get("size", 0),
-                        owner_login=repo.get("owner", {}).get("login", ""),
-                        owner_avatar=repo.get("owner", {}).get("avatar_url", "")
-                    ))
-                return repos
+                raise RuntimeError(f"GitHub API error: {response.status_code}")
+
+            # A full page of 100 repos runs to a few hundred KB
+            data = orjson.loads(response.content) if orjson is not None else response.json()
+            repos = []
+            for repo in data:
+                if not include_forks and repo.get("fork", False):
+                    continue
+                repos.append(GitHubRepo(
+                    id=repo.get("id", 0),
+                    name=repo.get("name", ""),
+                    full_name=repo.get("full_name", ""),
+                    description=repo.get("description"),
+                    html_url=repo.get("html_url", ""),
+                    clone_url=repo.get("clone_url", ""),
+                    ssh_url=repo.get("ssh_url", ""),
+                    default_branch=repo.get("default_branch", "main"),
+                    private=repo.get("private", False),
+                    fork=repo.get("fork", False),
+                    stargazers_count=repo.get("stargazers_count", 0),
+                    language=repo.get("language"),
+                    size=repo.get("size", 0),
+                    owner_login=repo.get("owner", {}).get("login", ""),
+                    owner_avatar=repo.get("owner", {}).get("avatar_url", "")
+                ))
+
+            match = _LAST_PAGE_RE.search(response.headers.get("link", ""))
+            last_page = int(match.group(1)) if match else None
         except (httpx.RequestError, httpx.TimeoutException) as e:
             logger.error("Network error fetching GitHub repos", error=str(e), page=page)
             raise
@@ -151,6 +288,12 @@ class GitHubService:
             logger.error("Failed to parse GitHub repos response", error=str(e), page=page)
             raise
 
+        # Callers get their own list, so extending it can't touch the cache
+        _repo_cache[key] = (time.monotonic() + REPO_CACHE_TTL_SECONDS, tuple(repos), last_page)
+        if len(_repo_cache) > REPO_CACHE_MAX_ENTRIES:
+            _repo_cache.popitem(last=False)
+        return repos, last_page
+
     async def get_all_repos(
         self, 
         include_forks: bool = False,
@@ -167,28 +310,43 @@ class GitHubService:
             
         Raises exceptions on failure - does not mask errors as empty results.
         """
-        all_repos = []
-        page = 1
-        while True:
-            repos = await self.get_repos(
-                include_forks=include_forks,
-                per_page=per_page,
-                page=page
-            )
-            all_repos.extend(repos)
-            
-            # Stop when we get fewer results than requested (last page)
-            if len(repos) < per_page:
-                break
-                
-            page += 1
-            
-            if max_pages is not None and page > max_pages:
-                logger.warning(
-                    "GitHub repo pagination stopped at limit",
-                    max_pages=max_pages,
-                    total_repos_fetched=len(all_repos),
-                    last_page_fetched=page - 1
+        client = _get_client()
+        all_repos, last_page = await self._fetch_repos_page(
+            client, include_forks, True, per_page, 1
+        )
+        if last_page is None:
+            return all_repos
+
+        # Page 1 told us how many pages there are, so fetch the rest at
+        # once instead of waiting a round trip per page. gather() keeps
+        # page order and surfaces the first error as-is.
+        final_page = last_page if max_pages is None else min(last_page, max_pages)
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_PAGES)
+
+        async def fetch(page: int) -> list[GitHubRepo]:
+            async with semaphore:
+                repos, _ = await self._fetch_repos_page(
+                    client, include_forks, True, per_page, page
                 )
-                break
+                return repos
+
+        tasks = [asyncio.ensure_future(fetch(page)) for page in range(2, final_page + 1)]
+        try:
+            pages = await asyncio.gather(*tasks)
+        except BaseException:
+            # No point finishing the other pages once one has failed
+            for task in tasks:
+                task.cancel()
+            raise
+
+        for repos in pages:
+            all_repos.extend(repos)
+
+        if final_page < last_page:
+            logger.warning(
+                "GitHub repo pagination stopped at limit",
+                max_pages=max_pages,
+                total_repos_fetched=len(all_repos),
+                last_page_fetched=final_page
+            )
         return all_repos
@@ -4,23 +4,53 @@ Manages GitHub OAuth connections in the database.
 
 Routes orchestrate HTTP/auth flow. This service handles persistence.
 """
+import asyncio
+import time
+from collections import OrderedDict
 from typing import Optional
 from datetime import datetime, timezone
 
 from services.observability import logger
 from services.supabase_service import get_supabase_service
 
+# Connections are read on every GitHub route but change only on
+# connect/disconnect, which evict the entry here. Found rows only: a user
+# who just connected must not be told they aren't.
+CONNECTION_CACHE_TTL_SECONDS = 30
+CONNECTION_CACHE_MAX_ENTRIES = 10_000
+_connection_cache: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+
+# last_used_at is informational, so instead of a DB round trip per request
+# the user ids are collected and written in one UPDATE every few seconds
+LAST_USED_FLUSH_SECONDS = 5.0
+_last_used_pending: set[str] = set()
+
 
 def get_connection(user_id: str) -> Optional[dict]:
     """Get user's GitHub connection from database."""
+    cached = _connection_cache.get(user_id)
+    if cached is not None:
+        expires_at, connection = cached
+        if expires_at > time.monotonic():
+            _connection_cache.move_to_end(user_id)
+            return dict(connection)
+        del _connection_cache[user_id]
+
     try:
         db = get_supabase_service().client
         result = db.table("github_connections").select("*").eq("user_id", user_id).execute()
-        return result.data[0] if result.data else None
     except Exception as e:
         logger.error("Failed to get GitHub connection", error=str(e), user_id=user_id)
         return None
 
+    if not result.data:
+        return None
+    connection = result.data[0]
+    _connection_cache[user_id] = (time.monotonic() + CONNECTION_CACHE_TTL_SECONDS, dict(connection))
+    if len(_connection_cache) > CONNECTION_CACHE_MAX_ENTRIES:
+        _connection_cache.popitem(last=False)
+    return connection
+
 
 def save_connection(
     user_id: str,
@@ -31,6 +61,7 @@ def save_connection(
     scope: str,
 ) -> bool:
     """Save or update GitHub connection in database."""
+    _connection_cache.pop(user_id, None)
     try:
         db = get_supabase_service().client
 
@@ -52,6 +83,7 @@ def save_connection(
 
 def delete_connection(user_id: str) -> bool:
     """Remove GitHub connection."""
+    _connection_cache.pop(user_id, None)
     try:
         db = get_supabase_service().client
         db.table("github_connections").delete().eq("user_id", user_id).execute()
@@ -62,11 +94,34 @@ def delete_connection(user_id: str) -> bool:
 
 
 def update_last_used(user_id: str) -> None:
-    """Update last_used_at timestamp."""
+    """Mark last_used_at for update; written by the next flush."""
+    _last_used_pending.add(user_id)
+
+
+def flush_last_used() -> None:
+    """Write last_used_at for every user marked since the last flush."""
+    # pop() one at a time: the flusher runs in a worker thread while
+    # requests keep adding ids, and anything added mid-drain just waits
+    # for the next flush instead of being lost
+    user_ids = []
+    while _last_used_pending:
+        try:
+            user_ids.append(_last_used_pending.pop())
+        except KeyError:
+            break
+    if not user_ids:
+        return
     try:
         db = get_supabase_service().client
         db.table("github_connections").update(
             {"last_used_at": datetime.now(timezone.utc).isoformat()}
-        ).eq("user_id", user_id).execute()
+        ).in_("user_id", user_ids).execute()
     except Exception as e:
-        logger.debug("Failed to update last_used_at", user_id=user_id, error=str(e))
+        logger.debug("Failed to update last_used_at", users=len(user_ids), error=str(e))
+
+
+async def run_last_used_flusher(interval: float = LAST_USED_FLUSH_SECONDS) -> None:
+    """Flush pending last_used_at updates forever (started at app boot)."""
+    while True:
+        await asyncio.sleep(interval)
+        await asyncio.to_thread(flush_last_used)
@@ -225,7 +225,7 @@ class OptimizedCodeIndexer:
         set_operation_context("indexing", repo_id=repo_id)
         add_breadcrumb("Starting repository indexing", category="indexing", repo_id=repo_id)
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         logger.info("Starting optimized indexing", repo_id=repo_id, path=repo_path)
         
         # Discover code files
@@ -314,7 +314,7 @@ class OptimizedCodeIndexer:
                 self.index.upsert(vectors=batch)
                 logger.debug("Vectors uploaded", progress=min(i + self.PINECONE_UPSERT_BATCH, len(vectors_to_upsert)), total=len(vectors_to_upsert))
         
-        elapsed = time.time() - start_time
+        elapsed = time.perf_counter() - start_time
         speed = len(all_functions_data) / elapsed if elapsed > 0 else 0
         
         logger.info(
@@ -421,7 +421,7 @@ class OptimizedCodeIndexer:
         """Index repository using V2 function-level extraction."""
         from services.search_v2 import generate_summaries as gen_summaries
 
-        start_time = time.time()
+        start_time = time.perf_counter()
         logger.info("V2 indexing started", repo_id=repo_id, with_summaries=generate_summaries,
                     include_paths=include_paths)
 
@@ -462,7 +462,7 @@ class OptimizedCodeIndexer:
         for i in range(0, len(vectors), self.PINECONE_UPSERT_BATCH):
             self.index.upsert(vectors=vectors[i:i + self.PINECONE_UPSERT_BATCH])
 
-        elapsed = time.time() - start_time
+        elapsed = time.perf_counter() - start_time
         logger.info("V2 indexing complete", repo_id=repo_id, functions=len(functions), duration_s=round(elapsed, 2))
         metrics.increment("indexing_v2_completed")
 
@@ -486,7 +486,7 @@ class OptimizedCodeIndexer:
             use_query_expansion: Expand query with related terms
             use_reranking: Rerank results with keyword boosting
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
         metrics.increment("search_requests")
         
         try:
@@ -530,7 +530,7 @@ class OptimizedCodeIndexer:
                     formatted_results
                 )
             
-            elapsed = time.time() - start_time
+            elapsed = time.perf_counter() - start_time
             logger.info("Search completed", repo_id=repo_id, results=len(formatted_results), duration_ms=round(elapsed*1000, 2))
             metrics.timing("search_latency_ms", elapsed * 1000)
             
@@ -552,7 +552,7 @@ class OptimizedCodeIndexer:
         """Hybrid search with BM25 fusion and Cohere reranking."""
         from services.search_v2 import HybridSearcher
 
-        start_time = time.time()
+        start_time = time.perf_counter()
         metrics.increment("search_v2_requests")
 
         try:
@@ -573,7 +573,7 @@ class OptimizedCodeIndexer:
                 use_reranking=use_reranking,
             )
 
-            elapsed = time.time() - start_time
+            elapsed = time.perf_counter() - start_time
             logger.info("Search V2 complete", repo_id=repo_id, results=len(results), duration_ms=round(elapsed*1000))
             metrics.timing("search_v2_latency_ms", elapsed * 1000)
 
@@ -607,7 +607,7 @@ class OptimizedCodeIndexer:
         """
         from services.search_v3.integration import get_search_v3
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         metrics.increment("search_v3_requests")
         
         try:
@@ -635,7 +635,7 @@ class OptimizedCodeIndexer:
                 pro_user=pro_user
             )
             
-            elapsed = time.time() - start_time
+            elapsed = time.perf_counter() - start_time
             logger.info("Search V3 complete", 
                        repo_id=repo_id, 
                        results=len(results), 
@@ -720,7 +720,7 @@ class OptimizedCodeIndexer:
             max_files: If set, limit indexing to first N files (for partial indexing)
             include_paths: If set, only index files under these directories
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
         logger.info("Starting optimized indexing with progress", repo_id=repo_id,
                     include_paths=include_paths)
 
@@ -834,7 +834,7 @@ class OptimizedCodeIndexer:
             batch = vectors_to_upsert[i:i + self.PINECONE_UPSERT_BATCH]
             self.index.upsert(vectors=batch)
         
-        elapsed = time.time() - start_time
+        elapsed = time.perf_counter() - start_time
         logger.info("Indexing with progress complete",
                     repo_id=repo_id,
                     total_functions=len(all_functions_data),
@@ -853,7 +853,7 @@ class OptimizedCodeIndexer:
         import git
         import time
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         logger.info("Starting INCREMENTAL indexing", repo_id=repo_id, last_commit=last_commit_sha[:8])
         
         try:
@@ -944,7 +944,7 @@ class OptimizedCodeIndexer:
                 batch = vectors_to_upsert[i:i + self.PINECONE_UPSERT_BATCH]
                 self.index.upsert(vectors=batch)
             
-            elapsed = time.time() - start_time
+            elapsed = time.perf_counter() - start_time
             
             logger.info("Incremental indexing complete",
                         repo_id=repo_id,
@@ -8,12 +8,25 @@ Channel format: indexing:{entity_id}:events
 Entity can be job_id (playground) or repo_id (dashboard).
 """
 import json
-from typing import Optional
+import time
+from typing import Dict, Optional, Tuple
 from enum import Enum
 from dataclasses import dataclass, asdict
 
 from services.observability import logger
 
+try:
+    import orjson
+except ModuleNotFoundError:
+    orjson = None
+
+
+def _dumps(event: dict) -> bytes:
+    """Serialize an event for Redis; orjson when available (hot during progress)"""
+    if orjson is not None:
+        return orjson.dumps(event)
+    return json.dumps(event).encode()
+
 
 class IndexingEventType(str, Enum):
     """Event types for indexing progress."""
@@ -25,7 +38,7 @@ class IndexingEventType(str, Enum):
     PING = "ping"
 
 
-@dataclass
+@dataclass(slots=True)
 class IndexingProgress:
     """Progress data for indexing event."""
     files_processed: int
@@ -37,25 +50,29 @@ class IndexingProgress:
 
     def __post_init__(self):
         # Guard against division by zero
-        if self.files_total <= 0:
+        files_total = self.files_total
+        if files_total <= 0:
             self.percent = 0
             return
-            
-        # If we have functions_total, we're in embedding phase (slow) - weight it 80%
-        # File extraction is fast, weight it 20%
+        
+        # Integer math: this runs once per file, and floor of the exact
+        # fraction avoids float round-off (e.g. 29.999... -> 29)
         if self.functions_total > 0:
-            file_progress = (self.files_processed / self.files_total) * 20  # 0-20%
-            embed_progress = (self.functions_found / self.functions_total) * 80  # 0-80%
-            raw_percent = file_progress + embed_progress
+            # Embedding phase (slow) weighs 80%, file extraction (fast) 20%
+            functions_total = self.functions_total
+            raw_percent = (
+                self.files_processed * 20 * functions_total
+                + self.functions_found * 80 * files_total
+            ) // (files_total * functions_total)
         else:
             # Still in file extraction phase (0-20%)
-            raw_percent = (self.files_processed / self.files_total) * 20
+            raw_percent = self.files_processed * 20 // files_total
         
         # Clamp to 0-100 range defensively
-        self.percent = max(0, min(100, int(raw_percent)))
+        self.percent = max(0, min(100, raw_percent))
 
 
-@dataclass
+@dataclass(slots=True)
 class IndexingStats:
     """Final stats for completed indexing."""
     files_processed: int
@@ -74,9 +91,16 @@ class IndexingEventPublisher:
     
     CHANNEL_PREFIX = "indexing:"
     CHANNEL_SUFFIX = ":events"
+    # Progress fires once per file; ticks closer together than this that
+    # don't move the percentage are coalesced (only the newest is kept)
+    PROGRESS_INTERVAL_SECONDS = 0.15
     
     def __init__(self, redis_client):
         self.redis = redis_client
+        # entity_id -> (monotonic time, percent) of the last progress sent
+        self._last_progress: Dict[str, Tuple[float, int]] = {}
+        # entity_id -> newest coalesced progress event not sent yet
+        self._pending_progress: Dict[str, dict] = {}
     
     def _get_channel(self, entity_id: str) -> str:
         """Get Redis pub/sub channel for entity."""
@@ -90,7 +114,7 @@ class IndexingEventPublisher:
         
         try:
             channel = self._get_channel(entity_id)
-            result = self.redis.publish(channel, json.dumps(event))
+            result = self.redis.publish(channel, _dumps(event))
             logger.info(
                 "Published event to Redis",
                 channel=channel,
@@ -146,11 +170,32 @@ class IndexingEventPublisher:
             functions_total=functions_total
         )
         
-        return self._publish(entity_id, {
+        event = {
             "type": IndexingEventType.PROGRESS.value,
             "entity_id": entity_id,
             **asdict(progress)
-        })
+        }
+
+        now = time.monotonic()
+        last = self._last_progress.get(entity_id)
+        if (
+            last is not None
+            and last[1] == progress.percent
+            and now - last[0] < self.PROGRESS_INTERVAL_SECONDS
+        ):
+            self._pending_progress[entity_id] = event
+            return True
+
+        self._pending_progress.pop(entity_id, None)
+        self._last_progress[entity_id] = (now, progress.percent)
+        return self._publish(entity_id, event)
+
+    def _flush_progress(self, entity_id: str) -> None:
+        """Send any coalesced progress before a terminal event"""
+        self._last_progress.pop(entity_id, None)
+        event = self._pending_progress.pop(entity_id, None)
+        if event is not None:
+            self._publish(entity_id, event)
     
     def publish_completed(
         self,
@@ -160,6 +205,7 @@ class IndexingEventPublisher:
         message: str = "Indexing complete"
     ) -> bool:
         """Publish indexing completed event."""
+        self._flush_progress(entity_id)
         return self._publish(entity_id, {
             "type": IndexingEventType.COMPLETED.value,
             "entity_id": entity_id,
@@ -176,6 +222,7 @@ class IndexingEventPublisher:
         recoverable: bool = False
     ) -> bool:
         """Publish indexing error event."""
+        self._flush_progress(entity_id)
         return self._publish(entity_id, {
             "type": IndexingEventType.ERROR.value,
             "entity_id": entity_id,
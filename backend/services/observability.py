@@ -18,13 +18,35 @@ Single import for all observability needs:
 import os
 import sys
 import time
+import atexit
 import logging
 import json
-from typing import Optional, Any, Dict, Deque
+import queue
+import threading
+from typing import Optional, Any, Dict, Deque, List, Tuple
 from functools import wraps
-from contextlib import contextmanager
+from inspect import iscoroutinefunction
 from datetime import datetime, timezone
 from collections import deque
+from dataclasses import dataclass
+from itertools import groupby, islice
+from operator import itemgetter
+
+try:
+    import orjson
+except ModuleNotFoundError:
+    orjson = None
+
+# Imported once here; the helpers below are on hot paths and used to retry
+# the import (and handle ImportError) on every call
+try:
+    import sentry_sdk
+except ModuleNotFoundError:
+    sentry_sdk = None
+
+# Set by init_sentry(). Without a DSN the SDK is installed but inert, and
+# the helpers skip straight past it instead of feeding a no-op client
+_sentry_enabled = False
 
 # Environment
 ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
@@ -32,6 +54,112 @@ IS_PRODUCTION = ENVIRONMENT == "production"
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO" if IS_PRODUCTION else "DEBUG")
 
 
+# LOG WRITER
+
+# Formatted lines are written by one background thread, a batch per write,
+# so request handlers never block on stdout (a slow log collector on the
+# other end of the pipe used to stall whoever logged). Bounded: if the
+# writer falls that far behind, new lines are dropped and counted.
+_LOG_QUEUE_SIZE = 10_000
+_LOG_BATCH_SIZE = 512
+
+_log_queue: "queue.Queue[Tuple[bool, str]]" = queue.Queue(maxsize=_LOG_QUEUE_SIZE)
+_log_writer: Optional[threading.Thread] = None
+_log_writer_lock = threading.Lock()
+
+
+def _write_log_batch(batch: List[Tuple[bool, str]]) -> None:
+    """Write one batch, one write per run of consecutive same-stream lines.
+
+    Runs rather than all-stdout-then-all-stderr, so an ERROR still shows up
+    before INFO lines logged after it (as with the old per-call print).
+    """
+    for to_stderr, run in groupby(batch, key=itemgetter(0)):
+        stream = sys.stderr if to_stderr else sys.stdout
+        try:
+            stream.write("\n".join(line for _, line in run) + "\n")
+            stream.flush()
+        except (OSError, ValueError):
+            pass  # stream closed (interpreter shutdown); nowhere left to log
+
+
+def _drain_logs() -> None:
+    while True:
+        batch = [_log_queue.get()]
+        while len(batch) < _LOG_BATCH_SIZE:
+            try:
+                batch.append(_log_queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            _write_log_batch(batch)
+        except Exception:
+            pass  # never let the writer die, flush_logs() waits on it
+        finally:
+            for _ in batch:
+                _log_queue.task_done()
+
+
+def _start_log_writer() -> None:
+    global _log_writer
+    with _log_writer_lock:
+        if _log_writer is None:
+            _log_writer = threading.Thread(target=_drain_logs, name="log-writer", daemon=True)
+            _log_writer.start()
+
+
+def _reset_log_writer() -> None:
+    # A forked child gets the queue but not the thread; start fresh
+    global _log_queue, _log_writer, _log_writer_lock
+    _log_queue = queue.Queue(maxsize=_LOG_QUEUE_SIZE)
+    _log_writer = None
+    _log_writer_lock = threading.Lock()
+
+
+def flush_logs(timeout: float = 2.0) -> bool:
+    """Wait up to `timeout` seconds for queued log lines to be written.
+
+    Bounded because this runs at exit: if stdout is a stalled pipe, losing
+    the tail of the log beats hanging shutdown. Returns False on timeout.
+    """
+    if _log_writer is None:
+        return True
+    deadline = time.monotonic() + timeout
+    # Queue.join() with a deadline
+    with _log_queue.all_tasks_done:
+        while _log_queue.unfinished_tasks:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            _log_queue.all_tasks_done.wait(remaining)
+    return True
+
+
+atexit.register(flush_logs)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_log_writer)
+
+
+# (epoch second, "YYYY-MM-DDTHH:MM:SS") -- swapped as one tuple so threads
+# never see a half-updated pair
+_ts_cache: Tuple[int, str] = (-1, "")
+
+
+def _utc_timestamp() -> str:
+    """ISO-8601 UTC timestamp for the stdlib-json log path.
+
+    Building a datetime and calling isoformat() per line is the slow part
+    without orjson; the seconds prefix only changes once a second, so cache
+    it and just append the microseconds.
+    """
+    global _ts_cache
+    seconds, micros = divmod(time.time_ns() // 1000, 1_000_000)
+    cached = _ts_cache
+    if cached[0] != seconds:
+        cached = _ts_cache = (seconds, time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds)))
+    return f"{cached[1]}.{micros:06d}+00:00"
+
+
 # STRUCTURED LOGGER
 
 class StructuredLogger:
@@ -47,31 +175,38 @@ class StructuredLogger:
         self.name = name
         self.level = getattr(logging, LOG_LEVEL.upper(), logging.INFO)
         self._context: Dict[str, Any] = {}
+        # The environment can't change at runtime, so pick the formatter once
+        self._format_message = self._format_json if IS_PRODUCTION else self._format_pretty
     
-    def _format_message(self, level: str, message: str, **kwargs) -> str:
-        """Format log message based on environment"""
+    def _format_json(self, level: str, message: str, **kwargs) -> str:
+        """JSON for production (easy to parse in log aggregators)"""
         data = {
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            # orjson writes aware datetimes natively, same string as isoformat()
+            "timestamp": datetime.now(timezone.utc) if orjson is not None else _utc_timestamp(),
             "level": level,
             "service": self.name,
             "message": message,
             **self._context,
             **kwargs
         }
-        
-        if IS_PRODUCTION:
-            # JSON for production (easy to parse in log aggregators)
-            return json.dumps(data)
-        else:
-            # Pretty format for development
-            extras = " | ".join(f"{k}={v}" for k, v in kwargs.items())
-            ctx = " | ".join(f"{k}={v}" for k, v in self._context.items())
-            parts = [f"[{level}] {message}"]
-            if ctx:
-                parts.append(f"[ctx: {ctx}]")
-            if extras:
-                parts.append(extras)
-            return " ".join(parts)
+        if orjson is not None:
+            return orjson.dumps(data).decode()
+        return json.dumps(data)
+    
+    def _format_pretty(self, level: str, message: str, **kwargs) -> str:
+        """Pretty format for development"""
+        # Most calls have no context and many have no kwargs; skip those
+        # joins outright. List comps beat generators inside join().
+        line = f"[{level}] {message}"
+        if self._context:
+            line += " [ctx: " + " | ".join([f"{k}={v}" for k, v in self._context.items()]) + "]"
+        if kwargs:
+            line += " " + " | ".join([f"{k}={v}" for k, v in kwargs.items()])
+        return line
+    
+    def isEnabledFor(self, level_num: int) -> bool:
+        """Whether a record at level_num would be emitted (stdlib-style guard)"""
+        return level_num >= self.level
     
     def _log(self, level: str, level_num: int, message: str, **kwargs) -> None:
         """Internal log method"""
@@ -80,9 +215,13 @@ class StructuredLogger:
         
         formatted = self._format_message(level, message, **kwargs)
         
+        if _log_writer is None:
+            _start_log_writer()
         # Use stderr for errors, stdout for rest
-        output = sys.stderr if level_num >= logging.ERROR else sys.stdout
-        print(formatted, file=output)
+        try:
+            _log_queue.put_nowait((level_num >= logging.ERROR, formatted))
+        except queue.Full:
+            metrics.increment("log_lines_dropped")
     
     def set_context(self, **kwargs) -> None:
         """Set persistent context for all subsequent logs"""
@@ -122,17 +261,18 @@ def set_operation_context(operation: str, **kwargs) -> None:
         operation: Type of operation (indexing, search, analysis, etc.)
         **kwargs: Additional context (repo_id, user_id, etc.)
     """
-    try:
-        import sentry_sdk
-        sentry_sdk.set_tag("operation", operation)
-        for key, value in kwargs.items():
-            sentry_sdk.set_tag(key, str(value))
-        sentry_sdk.set_context("operation_details", {
-            "type": operation,
-            **kwargs
-        })
-    except ImportError:
-        pass
+    if not _sentry_enabled:
+        return
+    # The module-level set_tag/set_context each look the isolation scope
+    # up again; resolve it once and set everything on it
+    scope = sentry_sdk.get_isolation_scope()
+    scope.set_tag("operation", operation)
+    for key, value in kwargs.items():
+        scope.set_tag(key, str(value))
+    scope.set_context("operation_details", {
+        "type": operation,
+        **kwargs
+    })
 
 
 def add_breadcrumb(message: str, category: str = "custom", level: str = "info", **data) -> None:
@@ -141,16 +281,14 @@ def add_breadcrumb(message: str, category: str = "custom", level: str = "info",
     
     Breadcrumbs show the trail of events leading to an error.
     """
-    try:
-        import sentry_sdk
-        sentry_sdk.add_breadcrumb(
-            message=message,
-            category=category,
-            level=level,
-            data=data
-        )
-    except ImportError:
-        pass
+    if not _sentry_enabled:
+        return
+    sentry_sdk.add_breadcrumb(
+        message=message,
+        category=category,
+        level=level,
+        data=data
+    )
 
 
 def capture_exception(error: Exception, **context) -> None:
@@ -160,33 +298,96 @@ def capture_exception(error: Exception, **context) -> None:
     Does NOT log to stdout -- callers are responsible for logging.
     This avoids double-logging when callers do logger.error() + capture_exception().
     """
-    try:
-        import sentry_sdk
-        with sentry_sdk.new_scope() as scope:
-            for key, value in context.items():
-                scope.set_extra(key, value)
-            sentry_sdk.capture_exception(error)
-    except ImportError:
+    if sentry_sdk is None:
         # No Sentry -- log as fallback so errors aren't silently lost
         logger.error(f"Exception (no Sentry): {type(error).__name__}: {error}", **context)
+        return
+    if not _sentry_enabled:
+        return
+    # Scope kwargs go onto the per-event scope the SDK merges anyway, so
+    # there's no need to fork a scope of our own just to attach extras
+    sentry_sdk.capture_exception(error, extras=context)
 
 
 def capture_message(message: str, level: str = "info", **context) -> None:
     """Capture a message (not exception) to Sentry"""
-    try:
-        import sentry_sdk
-        with sentry_sdk.new_scope() as scope:
-            for key, value in context.items():
-                scope.set_extra(key, value)
-            sentry_sdk.capture_message(message, level=level)
-    except ImportError:
-        pass
+    if not _sentry_enabled:
+        return
+    sentry_sdk.capture_message(message, level=level, extras=context)
 
 
 # PERFORMANCE TRACKING
 
-@contextmanager
-def track_time(operation: str, **tags):
+class _TrackTime:
+    """Context manager/decorator behind track_time().
+
+    A plain class rather than @contextmanager: this wraps playground session
+    reads/writes on every request, and the generator version built a
+    generator plus a contextlib wrapper per use.
+    """
+    __slots__ = ("operation", "tags", "_start", "_span")
+
+    def __init__(self, operation: str, tags: Dict[str, Any]) -> None:
+        self.operation = operation
+        self.tags = tags
+        self._start = 0.0
+        self._span = None
+
+    def __enter__(self) -> "_TrackTime":
+        self._start = time.perf_counter()
+        # Start a Sentry span only under a sampled transaction. Spans outside
+        # one are never sent, and production samples 10% of transactions, so
+        # most calls would build a child span just to drop it.
+        if _sentry_enabled:
+            parent = sentry_sdk.get_current_span()
+            if parent is not None and parent.sampled:
+                self._span = parent.start_child(op=self.operation, description=self.operation)
+                for key, value in self.tags.items():
+                    self._span.set_tag(key, str(value))
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        duration_ms = round((time.perf_counter() - self._start) * 1000, 2)
+
+        # Guards below skip building messages nobody will receive: DEBUG is
+        # off in production and Sentry is often not configured. There's no
+        # "Started" breadcrumb -- the span marks the start, and the one on
+        # completion carries the duration.
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"{self.operation} completed", duration_ms=duration_ms, **self.tags)
+
+        if self._span is not None:
+            self._span.finish()
+            self._span = None
+
+        if _sentry_enabled:
+            add_breadcrumb(
+                f"Completed: {self.operation}",
+                category="performance",
+                duration_ms=duration_ms,
+                **self.tags
+            )
+
+    def __call__(self, func):
+        # Decorator use: a fresh timer per call (the instance holds per-use
+        # state), and coroutines are timed until they finish rather than
+        # until they're created
+        operation, tags = self.operation, self.tags
+        if iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with _TrackTime(operation, tags):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(func)
+        def sync_wrapper(*args, **kwargs):
+            with _TrackTime(operation, tags):
+                return func(*args, **kwargs)
+        return sync_wrapper
+
+
+def track_time(operation: str, **tags) -> _TrackTime:
     """
     Context manager to track operation duration.
     
@@ -194,41 +395,22 @@ def track_time(operation: str, **tags):
         with track_time("embedding_batch", batch_size=100):
             embeddings = await create_embeddings(texts)
     
-    Logs duration and creates Sentry span if available.
+    Also works as a decorator on sync or async functions. Logs duration
+    and creates Sentry span if available.
     """
-    start = time.perf_counter()
-    
-    # Start Sentry span if available
-    span = None
-    try:
-        import sentry_sdk
-        span = sentry_sdk.start_span(op=operation, description=operation)
-        for key, value in tags.items():
-            span.set_tag(key, str(value))
-    except ImportError:
-        pass
-    
-    add_breadcrumb(f"Started: {operation}", category="performance", **tags)
-    
-    try:
-        yield
-    finally:
-        duration = time.perf_counter() - start
-        duration_ms = round(duration * 1000, 2)
-        
-        # Log completion
-        logger.debug(f"{operation} completed", duration_ms=duration_ms, **tags)
-        
-        # Finish Sentry span
-        if span:
-            span.finish()
-        
-        add_breadcrumb(
-            f"Completed: {operation}",
-            category="performance",
-            duration_ms=duration_ms,
-            **tags
-        )
+    return _TrackTime(operation, tags)
+
+
+# kwargs worth attaching to a traced call's logs and Sentry context
+_TRACE_CONTEXT_KEYS = ('repo_id', 'user_id', 'query', 'file_path')
+
+
+def _trace_context(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    # Probe the four known keys rather than scanning every kwarg; most
+    # calls pass positionals only and skip this entirely
+    if not kwargs:
+        return {}
+    return {k: kwargs[k] for k in _TRACE_CONTEXT_KEYS if k in kwargs}
 
 
 def trace_operation(operation: str):
@@ -244,11 +426,9 @@ def trace_operation(operation: str):
         @wraps(func)
         async def async_wrapper(*args, **kwargs):
             # Extract useful context from kwargs
-            context = {k: v for k, v in kwargs.items() 
-                      if k in ('repo_id', 'user_id', 'query', 'file_path')}
+            context = _trace_context(kwargs)
             
             set_operation_context(operation, **context)
-            add_breadcrumb(f"Starting {operation}", category="function", **context)
             
             start = time.perf_counter()
             try:
@@ -259,6 +439,15 @@ def trace_operation(operation: str):
                     duration_s=round(duration, 2),
                     **context
                 )
+                # One breadcrumb per call, on finish; failures already go to
+                # capture_exception with the operation and duration
+                if _sentry_enabled:
+                    add_breadcrumb(
+                        f"Finished {operation}",
+                        category="function",
+                        duration_ms=round(duration * 1000, 2),
+                        **context
+                    )
                 return result
             except Exception as e:
                 duration = time.perf_counter() - start
@@ -267,11 +456,9 @@ def trace_operation(operation: str):
         
         @wraps(func)
         def sync_wrapper(*args, **kwargs):
-            context = {k: v for k, v in kwargs.items() 
-                      if k in ('repo_id', 'user_id', 'query', 'file_path')}
+            context = _trace_context(kwargs)
             
             set_operation_context(operation, **context)
-            add_breadcrumb(f"Starting {operation}", category="function", **context)
             
             start = time.perf_counter()
             try:
@@ -282,6 +469,15 @@ def trace_operation(operation: str):
                     duration_s=round(duration, 2),
                     **context
                 )
+                # One breadcrumb per call, on finish; failures already go to
+                # capture_exception with the operation and duration
+                if _sentry_enabled:
+                    add_breadcrumb(
+                        f"Finished {operation}",
+                        category="function",
+                        duration_ms=round(duration * 1000, 2),
+                        **context
+                    )
                 return result
             except Exception as e:
                 duration = time.perf_counter() - start
@@ -289,8 +485,7 @@ def trace_operation(operation: str):
                 raise
         
         # Return appropriate wrapper based on function type
-        import asyncio
-        if asyncio.iscoroutinefunction(func):
+        if iscoroutinefunction(func):
             return async_wrapper
         return sync_wrapper
     
@@ -299,6 +494,43 @@ def trace_operation(operation: str):
 
 # METRICS (unified counters + performance tracking)
 
+@dataclass(slots=True)
+class _IndexingRecord:
+    repo_id: str
+    duration: float
+    function_count: int
+    speed: float
+    timestamp: float  # epoch seconds; ISO-formatted only when reported
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "repo_id": self.repo_id,
+            "duration": self.duration,
+            "function_count": self.function_count,
+            "speed": self.speed,
+            "timestamp": datetime.fromtimestamp(self.timestamp, timezone.utc).isoformat(),
+        }
+
+
+@dataclass(slots=True)
+class _SearchRecord:
+    duration: float
+    cached: bool
+    timestamp: float
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "duration": self.duration,
+            "cached": self.cached,
+            "timestamp": datetime.fromtimestamp(self.timestamp, timezone.utc).isoformat(),
+        }
+
+
+def _tail(items: Deque, n: int) -> list:
+    """Last n items of a deque without copying the whole thing first"""
+    return list(islice(items, max(0, len(items) - n), None))
+
+
 class Metrics:
     """
     Unified metrics: generic counters/timings/gauges plus
@@ -318,20 +550,27 @@ class Metrics:
         self._timings: Dict[str, Deque[float]] = {}
         self._gauges: Dict[str, float] = {}
         # Domain-specific tracking (replaces PerformanceMetrics)
-        self._indexing_times: deque = deque(maxlen=100)
-        self._search_times: deque = deque(maxlen=100)
+        # Fixed-shape slotted records; the dashboard dicts are built on read
+        self._indexing_times: Deque[_IndexingRecord] = deque(maxlen=100)
+        self._search_times: Deque[_SearchRecord] = deque(maxlen=100)
         self._total_searches: int = 0
         self._total_indexing_ops: int = 0
+        # Metrics are hit from worker threads too (to_thread, executors);
+        # every read-modify-write (counters, totals) and reset() take the lock
+        self._lock = threading.Lock()
     
     def increment(self, name: str, value: int = 1, **tags) -> None:
         """Increment a counter"""
-        self._counters[name] = self._counters.get(name, 0) + value
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
     
     def timing(self, name: str, value_ms: float) -> None:
         """Record a timing measurement"""
-        if name not in self._timings:
-            self._timings[name] = deque(maxlen=1000)
-        self._timings[name].append(value_ms)
+        values = self._timings.get(name)
+        if values is None:
+            # setdefault is atomic, so racing first calls share one deque
+            values = self._timings.setdefault(name, deque(maxlen=1000))
+        values.append(value_ms)
     
     def gauge(self, name: str, value: float) -> None:
         """Record a point-in-time value"""
@@ -339,30 +578,28 @@ class Metrics:
     
     def record_indexing(self, repo_id: str, duration: float, function_count: int) -> None:
         """Record indexing performance for dashboard metrics."""
-        self._indexing_times.append({
-            "repo_id": repo_id,
-            "duration": duration,
-            "function_count": function_count,
-            "speed": function_count / duration if duration > 0 else 0,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-        })
-        self._total_indexing_ops += 1
+        self._indexing_times.append(_IndexingRecord(
+            repo_id,
+            duration,
+            function_count,
+            function_count / duration if duration > 0 else 0,
+            time.time(),
+        ))
+        with self._lock:
+            self._total_indexing_ops += 1
     
     def record_search(self, duration: float, cached: bool) -> None:
         """Record search performance for dashboard metrics."""
-        self._search_times.append({
-            "duration": duration,
-            "cached": cached,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-        })
-        self._total_searches += 1
+        self._search_times.append(_SearchRecord(duration, cached, time.time()))
+        with self._lock:
+            self._total_searches += 1
         # cache hit/miss counting handled by cache.py via metrics.increment()
         # to avoid double counting now that we're a single Metrics instance
     
     def get_metrics(self) -> Dict[str, Any]:
         """Dashboard-friendly performance summary (used by /health and /metrics)."""
-        indexing_speeds = [m["speed"] for m in self._indexing_times]
-        search_durations = [m["duration"] for m in self._search_times]
+        indexing_speeds = [m.speed for m in self._indexing_times]
+        search_durations = [m.duration for m in self._search_times]
         avg_indexing_speed = (
             sum(indexing_speeds) / len(indexing_speeds) if indexing_speeds else 0
         )
@@ -377,7 +614,7 @@ class Metrics:
                 "avg_speed_functions_per_sec": avg_indexing_speed,
                 "max_speed": max(indexing_speeds) if indexing_speeds else 0,
                 "min_speed": min(indexing_speeds) if indexing_speeds else 0,
-                "recent_operations": list(self._indexing_times)[-10:],
+                "recent_operations": [m.as_dict() for m in _tail(self._indexing_times, 10)],
             },
             "search": {
                 "total_searches": self._total_searches,
@@ -388,7 +625,7 @@ class Metrics:
                     sum(search_durations) / len(search_durations) * 1000
                     if search_durations else 0
                 ),
-                "recent_searches": list(self._search_times)[-10:],
+                "recent_searches": [m.as_dict() for m in _tail(self._search_times, 10)],
             },
             "summary": {
                 "health": "healthy",
@@ -406,7 +643,9 @@ class Metrics:
             "gauges": self._gauges.copy(),
             "timings": {},
         }
-        for name, values in self._timings.items():
+        # Snapshot before iterating: other threads may be appending
+        for name, values in list(self._timings.items()):
+            values = list(values)
             if values:
                 stats["timings"][name] = {
                     "count": len(values),
@@ -418,19 +657,21 @@ class Metrics:
     
     def reset(self) -> None:
         """Reset all metrics"""
-        self._counters = {}
-        self._timings = {}
-        self._gauges = {}
-        self._indexing_times.clear()
-        self._search_times.clear()
-        self._total_searches = 0
-        self._total_indexing_ops = 0
+        with self._lock:
+            self._counters = {}
+            self._timings = {}
+            self._gauges = {}
+            self._indexing_times.clear()
+            self._search_times.clear()
+            self._total_searches = 0
+            self._total_indexing_ops = 0
 
 
 # SENTRY INITIALIZATION (moved from services/sentry.py)
 
 def init_sentry() -> bool:
     """Initialize Sentry SDK if SENTRY_DSN is configured."""
+    global _sentry_enabled
     sentry_dsn = os.getenv("SENTRY_DSN")
 
     if not sentry_dsn:
@@ -464,6 +705,7 @@ def init_sentry() -> bool:
             include_local_variables=include_locals,
         )
 
+        _sentry_enabled = True
         print(f"[OK] Sentry initialized (environment: {environment})")
         return True
 
@@ -497,28 +739,24 @@ def _filter_events(event: Dict[str, Any], hint: Optional[Dict[str, Any]]) -> Opt
 
 def set_user_context(user_id: Optional[str] = None, email: Optional[str] = None) -> None:
     """Set Sentry user context for error attribution."""
-    try:
-        import sentry_sdk
-        user_data: Dict[str, Any] = {"id": user_id}
-        # Only include email if PII opt-in is enabled
-        if email and os.getenv("SENTRY_SEND_PII", "false").lower() in ("true", "1"):
-            user_data["email"] = email
-        sentry_sdk.set_user(user_data)
-    except ImportError:
-        pass
+    if not _sentry_enabled:
+        return
+    user_data: Dict[str, Any] = {"id": user_id}
+    # Only include email if PII opt-in is enabled
+    if email and os.getenv("SENTRY_SEND_PII", "false").lower() in ("true", "1"):
+        user_data["email"] = email
+    sentry_sdk.set_user(user_data)
 
 
 def capture_http_exception(request: Any, exc: Exception, status_code: int) -> None:
     """Capture HTTP exception with request context for Sentry."""
-    try:
-        import sentry_sdk
-        with sentry_sdk.new_scope() as scope:
-            scope.set_extra("status_code", status_code)
-            scope.set_extra("path", str(request.url.path))
-            scope.set_extra("method", request.method)
-            sentry_sdk.capture_exception(exc)
-    except ImportError:
-        pass
+    if not _sentry_enabled:
+        return
+    sentry_sdk.capture_exception(exc, extras={
+        "status_code": status_code,
+        "path": str(request.url.path),
+        "method": request.method,
+    })
 
 
 # Global instances
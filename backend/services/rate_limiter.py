@@ -52,7 +52,8 @@ def rate_limit(requests_per_minute: int = 60):
             client_id = request.client.host if request.client else "unknown"
             
             key = f"{func.__name__}:{client_id}"
-            now = time.time()
+            # Process-local window, so use a clock that NTP can't step
+            now = time.monotonic()
             window_start = now - 60
             
             # Periodic cleanup of stale keys to prevent unbounded memory growth
@@ -161,6 +161,10 @@ class RepositoryManager:
                 shutil.rmtree(local_path)
             raise Exception(f"Failed to clone repository: {str(e)}")
 
+    def has_local_clone(self, repo_id: str) -> bool:
+        """True when the working tree for repo_id is already on disk (no clone needed)."""
+        return (self.repos_dir / repo_id / ".git").exists()
+
     async def ensure_clone(self, repo: dict) -> str:
         """Guarantee the working tree exists on disk, lazily re-cloning from git_url if needed.
 
@@ -173,7 +177,7 @@ class RepositoryManager:
         canonical = self.repos_dir / repo_id
 
         # Warm path: clone present. No re-clone, no event-loop work.
-        if (canonical / ".git").exists():
+        if self.has_local_clone(repo_id):
             repo["local_path"] = str(canonical)
             return str(canonical)
 
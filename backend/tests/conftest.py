@@ -159,6 +159,14 @@ def mock_git():
         yield mock
 
 
+@pytest.fixture(autouse=True)
+def flush_log_writer():
+    """Write queued log lines while pytest is still capturing this test"""
+    yield
+    from services.observability import flush_logs
+    flush_logs()
+
+
 @pytest.fixture
 def client():
     """TestClient with mocked dependencies and auth bypass for testing"""
@@ -0,0 +1,625 @@
+"""
+Tests for DNAExtractor -- architectural pattern extraction
+"""
+import pytest
+
+
+@pytest.fixture
+def extractor():
+    from unittest.mock import MagicMock
+    from services.dna_extractor import DNAExtractor
+
+    ext = DNAExtractor()
+    # empty DNA cache by default
+    ext._supabase = MagicMock()
+    ext._supabase.client.table.return_value.select.return_value.eq.return_value.execute.return_value.data = []
+    return ext
+
+
+def _cache_returns(extractor, dna):
+    """Make load_from_cache return the given DNA"""
+    result = extractor._supabase.client.table.return_value.select.return_value.eq.return_value.execute.return_value
+    result.data = [{"architecture_patterns": {"codebase_dna": dna.to_dict()}}]
+
+
+@pytest.fixture
+def fastapi_project(tmp_path):
+    """Small FastAPI + Supabase backend, shaped like this repo"""
+    (tmp_path / "services").mkdir()
+    (tmp_path / "routes").mkdir()
+    (tmp_path / "config").mkdir()
+    (tmp_path / "migrations").mkdir()
+    (tmp_path / "tests").mkdir()
+
+    (tmp_path / "main.py").write_text('''
+from fastapi import FastAPI
+from services.observability import logger
+
+app = FastAPI()
+app.add_middleware(CORSMiddleware)
+''')
+    (tmp_path / "dependencies.py").write_text('''
+from services.cache import CacheService
+from services.indexer import CodeIndexer
+
+cache = CacheService()
+indexer = CodeIndexer()
+''')
+    (tmp_path / "services" / "cache.py").write_text('''
+import os
+from services.observability import logger
+from services.supabase_service import get_supabase_service
+
+
+class CacheError(Exception):
+    pass
+
+
+class CacheService:
+    def get_value(self, key):
+        try:
+            return get_supabase_service().client.table("cache").select("*").execute()
+        except Exception as e:
+            logger.error("cache read failed", error=str(e))
+            raise CacheError(key)
+
+    def set_value(self, key, value):
+        logger.info("cache write", key=key)
+        metrics.increment("cache_writes")
+
+    def expire_all(self):
+        return os.getenv("CACHE_TTL")
+''')
+    (tmp_path / "services" / "indexer.py").write_text('''
+from services.observability import logger
+
+
+class CodeIndexer:
+    def index_repo(self, repo_id):
+        logger.debug("indexing", repo_id=repo_id)
+
+    def search_code(self, query):
+        logger.warning("slow search")
+''')
+    (tmp_path / "routes" / "repos.py").write_text('''
+from fastapi import APIRouter, Depends, HTTPException
+from middleware.auth import require_auth, AuthContext
+from services.observability import logger
+
+router = APIRouter(prefix="/api/v1/repos", tags=["Repositories"])
+
+
+@router.get("/{repo_id}")
+def get_repo(repo_id: str, auth: AuthContext = Depends(require_auth)):
+    repo = get_repo_or_404(repo_id, auth.user_id)
+    if repo["user_id"] == auth.user_id:
+        return repo
+    raise HTTPException(status_code=404)
+''')
+    (tmp_path / "config" / "api.py").write_text('API_PREFIX = "/api/v1"\n')
+    (tmp_path / "migrations" / "001_init.sql").write_text('''
+CREATE TABLE repos (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    user_id UUID REFERENCES users(id) ON DELETE CASCADE,
+    created_at TIMESTAMPTZ DEFAULT now()
+);
+ALTER TABLE repos ENABLE ROW LEVEL SECURITY;
+''')
+    (tmp_path / "tests" / "conftest.py").write_text('''
+import pytest
+from unittest.mock import MagicMock
+
+
+@pytest.fixture
+def client():
+    return MagicMock()
+''')
+    (tmp_path / "tests" / "test_cache.py").write_text('''
+import pytest
+from unittest.mock import patch
+
+
+def test_get_value(client):
+    assert client is not None
+''')
+    (tmp_path / "CLAUDE.md").write_text("# Rules\n\n- Use snake_case\n")
+
+    # noise that discovery must skip
+    (tmp_path / "node_modules" / "express").mkdir(parents=True)
+    (tmp_path / "node_modules" / "express" / "index.js").write_text('const express = require("express")\n')
+    return tmp_path
+
+
+class TestNamingConventions:
+    def test_classify_function_name(self):
+        from services.dna_analyzer import _classify_function_name
+        assert _classify_function_name("get_value") == "snake_case"
+        assert _classify_function_name("getValue") == "camelCase"
+        assert _classify_function_name("_private") is None
+        assert _classify_function_name("run") is None
+        assert _classify_function_name("Run") is None
+
+    def test_snake_case_project(self, extractor, fastapi_project):
+        dna = extractor.extract_dna(str(fastapi_project), "repo-1")
+        assert dna.naming_conventions.function_style == "snake_case"
+        assert dna.naming_conventions.class_style == "PascalCase"
+        assert dna.naming_conventions.constant_style == "UPPER_SNAKE_CASE"
+
+    def test_class_regex_stays_on_one_line(self, extractor, tmp_path):
+        (tmp_path / "codes.py").write_text(
+            "# values for the error class\nErrorCode = 1\n\nclass NotFoundError(Exception):\n    pass\n"
+        )
+        dna = extractor.extract_dna(str(tmp_path), "repo-1")
+        assert dna.error_patterns.exception_classes == ["NotFoundError"]
+
+    def test_camel_case_wins_by_count(self, extractor, tmp_path):
+        (tmp_path / "mod.py").write_text(
+            "def getUser():\n    pass\n\ndef saveUser():\n    pass\n\ndef load_all():\n    pass\n"
+        )
+        dna = extractor.extract_dna(str(tmp_path), "repo-1")
+        assert dna.naming_conventions.function_style == "camelCase"
+
+
+class TestFrameworkDetection:
+    def test_scores_by_occurrence_count(self, extractor, tmp_path):
+        # flask hits three distinct indicators once; express hits one, four times
+        (tmp_path / "app.py").write_text(
+            "from flask import Flask\napp = Flask(__name__)\n\n@app.route('/')\ndef index():\n    pass\n"
+        )
+        (tmp_path / "server.js").write_text("app.use(a)\napp.use(b)\napp.use(c)\napp.use(d)\n")
+        dna = extractor.extract_dna(str(tmp_path), "repo-1")
+        assert dna.detected_framework == "express"
+
+    def test_no_indicators(self, extractor, tmp_path):
+        (tmp_path / "util.py").write_text("def add(a, b):\n    return a + b\n")
+        dna = extractor.extract_dna(str(tmp_path), "repo-1")
+        assert dna.detected_framework is None
+
+
+class TestExtractDna:
+    def test_detects_core_patterns(self, extractor, fastapi_project):
+        dna = extractor.extract_dna(str(fastapi_project), "repo-1")
+
+        assert dna.detected_framework == "fastapi"
+        assert dna.language_distribution == {"python": 8}
+        assert "require_auth" in dna.auth_patterns.middleware_used
+        assert dna.auth_patterns.auth_context_type == "AuthContext"
+        assert "get_repo_or_404(repo_id, auth.user_id)" in dna.auth_patterns.ownership_checks
+        assert "Depends(require_auth)" in dna.middleware_patterns
+        assert "app.add_middleware()" in dna.middleware_patterns
+        assert dna.service_patterns.dependencies_file == "dependencies.py"
+        assert "cache = CacheService()" in dna.service_patterns.singleton_services
+        assert dna.database_patterns.id_type == "UUID (gen_random_uuid())"
+        assert dna.database_patterns.timestamp_type == "TIMESTAMPTZ"
+        assert dna.database_patterns.has_rls is True
+        assert dna.database_patterns.cascade_deletes is True
+        assert dna.database_patterns.connection_pattern == "Singleton: get_supabase_service()"
+        assert "CacheError" in dna.error_patterns.exception_classes
+        assert dna.error_patterns.http_exception_usage is True
+        assert dna.error_patterns.logging_on_error is True
+        assert dna.logging_patterns.logger_import == "from services.observability import logger"
+        assert set(dna.logging_patterns.log_levels_used) >= {"debug", "info", "warning", "error"}
+        assert dna.logging_patterns.metrics_tracking is True
+        assert dna.test_patterns.framework == "pytest"
+        assert dna.test_patterns.has_conftest is True
+        assert dna.test_patterns.mock_library == "unittest.mock"
+        assert dna.config_patterns.secrets_handling == "Environment variables"
+        assert dna.api_versioning == "/api/v1 (from config/api.py)"
+        assert dna.router_pattern == 'APIRouter(prefix="/api/v1/repos", tags=[...])'
+        assert dna.team_rules_source == "CLAUDE.md"
+        assert "from services.observability import logger" in dna.common_imports
+
+    def test_skips_vendored_directories(self, extractor, fastapi_project):
+        files = extractor._discover_files(fastapi_project)
+        assert files
+        assert not any("node_modules" in f.parts for f in files)
+
+    def test_discovery_skips_symlinks_and_keeps_rglob_order(self, extractor, fastapi_project):
+        (fastapi_project / "linked").symlink_to(fastapi_project / "services")
+        (fastapi_project / "alias.py").symlink_to(fastapi_project / "main.py")
+
+        files = extractor._discover_files(fastapi_project)
+        expected = [
+            f for f in fastapi_project.rglob("*")
+            if not f.is_symlink() and f.is_file() and f.suffix in {".py", ".sql"}
+            and "node_modules" not in f.parts
+        ]
+        assert files == expected
+
+    def test_include_paths_limits_scope(self, extractor, fastapi_project):
+        dna = extractor.extract_dna(str(fastapi_project), "repo-1", include_paths=["services"])
+        assert dna.language_distribution == {"python": 2}
+
+    def test_missing_repo_path_raises(self, extractor, tmp_path):
+        with pytest.raises(ValueError):
+            extractor.extract_dna(str(tmp_path / "missing"), "repo-1")
+
+    def test_each_file_read_once(self, extractor, fastapi_project):
+        import os
+        from collections import Counter
+        from unittest.mock import patch
+
+        reads = Counter()
+        real_open = os.open
+
+        def counting_open(file, *args, **kwargs):
+            reads[str(file)] += 1
+            return real_open(file, *args, **kwargs)
+
+        with patch("services.dna_extractor.os.open", counting_open):
+            extractor.extract_dna(str(fastapi_project), "repo-1")
+
+        assert reads
+        assert max(reads.values()) == 1
+
+    def test_read_source_sniffs_binaries(self, tmp_path):
+        from services.dna_extractor import _read_source
+
+        (tmp_path / "logo.py").write_bytes(b"\x89PNG\r\n\x1a\n\x00\x00" + b"x" * 10000)
+        assert _read_source(tmp_path / "logo.py", 1024 * 1024) == (None, "files_skipped")
+
+        # longer than the sniff window: the rest still gets read
+        text = "x = 1\n" * 2000 + "# tail\n"
+        (tmp_path / "big.py").write_text(text)
+        assert _read_source(tmp_path / "big.py", 1024 * 1024) == (text, "files_read")
+
+    def test_parallel_matches_serial(self, extractor, fastapi_project):
+        from unittest.mock import patch
+        import services.dna_extractor as dna_extractor
+
+        serial = extractor.extract_dna(str(fastapi_project), "repo-1")
+
+        extractor.PARALLEL_MIN_FILES = 0
+        extractor.PARALLEL_WORKERS = 2
+        with patch.object(dna_extractor.logger, "warning") as warning:
+            parallel = extractor.extract_dna(str(fastapi_project), "repo-1")
+        warning.assert_not_called()  # the pool really ran, no serial fallback
+
+        # dedup keeps first-seen order, so even list order has to match
+        assert parallel.to_markdown() == serial.to_markdown()
+        assert parallel == serial
+
+    def test_file_cache_skips_unchanged_files(self, extractor, fastapi_project):
+        (fastapi_project / ".git").mkdir()
+        cold = extractor.extract_dna(str(fastapi_project), "repo-1")
+        assert (fastapi_project / ".git" / "codeintel_dna_cache.sqlite").exists()
+
+        warm = extractor.extract_dna(str(fastapi_project), "repo-1")
+        assert extractor._stats["files_cached"] == 9
+        assert warm.to_dict() == cold.to_dict()
+
+        (fastapi_project / "services" / "cache.py").write_text(
+            "import logging\nlogger = logging.getLogger(__name__)\n"
+        )
+        extractor.extract_dna(str(fastapi_project), "repo-1")
+        assert extractor._stats["files_cached"] == 8
+
+    def test_merge_keeps_fallback_values_weak(self):
+        from services.dna_analyzer import _PatternAccumulator
+
+        first, later = _PatternAccumulator(), _PatternAccumulator()
+        first.database.orm_used = "SQLAlchemy"
+        later.database.orm_used = "Supabase"
+        later.database.has_rls = True
+        later.tests.framework = "pytest"
+        first.merge(later)
+
+        assert first.database.orm_used == "SQLAlchemy"
+        assert first.database.has_rls is True
+        assert first.tests.framework == "pytest"
+
+    def test_indicator_scan_without_ahocorasick(self, extractor, fastapi_project):
+        from unittest.mock import patch
+        from services import dna_analyzer
+
+        text = "from fastapi import APIRouter\nrouter = APIRouter()\n"
+        fallback = dna_analyzer._count_indicators(text, dna_analyzer._INDICATORS, None)
+        assert fallback["APIRouter"] == 2
+        assert fallback["from fastapi"] == 1
+
+        expected = extractor.extract_dna(str(fastapi_project), "repo-1").to_dict()
+        with patch.object(dna_analyzer, "_AUTOMATON", None), \
+                patch.object(dna_analyzer, "_FOLDED_AUTOMATON", None):
+            assert extractor.extract_dna(str(fastapi_project), "repo-1").to_dict() == expected
+
+    def test_markdown_render(self, extractor, fastapi_project):
+        md = extractor.extract_dna(str(fastapi_project), "repo-1").to_markdown()
+        assert md.startswith("# Codebase DNA\n\n")
+        assert "**Detected Framework:** fastapi" in md
+        assert "## Team Rules" in md
+
+    def test_parsers_are_per_thread(self, extractor):
+        from concurrent.futures import ThreadPoolExecutor
+
+        mine = extractor._get_parser("python")
+        assert extractor._get_parser("python") is mine
+        assert extractor._get_parser("cobol") is None
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            theirs = pool.submit(extractor._get_parser, "python").result()
+        assert theirs is not mine
+
+
+class TestCache:
+    def test_save_many_batches_upserts(self, extractor):
+        from services.dna_extractor import CodebaseDNA
+
+        supabase = extractor._supabase
+        extractor.CACHE_BATCH_SIZE = 2
+        items = [(f"repo-{i}", CodebaseDNA(repo_id=f"repo-{i}")) for i in range(5)]
+
+        assert extractor.save_many_to_cache(items) is True
+
+        upsert = supabase.client.table.return_value.upsert
+        assert upsert.call_count == 3
+        batch_sizes = [len(c.args[0]) for c in upsert.call_args_list]
+        assert batch_sizes == [2, 2, 1]
+        first_row = upsert.call_args_list[0].args[0][0]
+        assert first_row["repo_id"] == "repo-0"
+        assert first_row["architecture_patterns"]["codebase_dna"]["repo_id"] == "repo-0"
+        assert upsert.call_args_list[0].kwargs == {"on_conflict": "repo_id"}
+
+    def test_save_many_empty_is_noop(self, extractor):
+        from unittest.mock import MagicMock
+
+        supabase = MagicMock()
+        extractor._supabase = supabase
+        assert extractor.save_many_to_cache([]) is True
+        supabase.client.table.assert_not_called()
+
+    def test_save_many_reports_failure(self, extractor):
+        from unittest.mock import MagicMock
+        from services.dna_extractor import CodebaseDNA
+
+        supabase = MagicMock()
+        supabase.client.table.return_value.upsert.return_value.execute.side_effect = RuntimeError("boom")
+        extractor._supabase = supabase
+        assert extractor.save_many_to_cache([("repo-1", CodebaseDNA(repo_id="repo-1"))]) is False
+
+    def test_to_dict_round_trip(self, extractor, fastapi_project):
+        from services.dna_extractor import CodebaseDNA
+
+        dna = extractor.extract_dna(str(fastapi_project), "repo-1")
+        data = dna.to_dict()
+        assert isinstance(data["auth_patterns"], dict)
+        assert CodebaseDNA.from_dict(data) == dna
+
+    def test_rendering_is_memoized(self, extractor, fastapi_project):
+        dna = extractor.extract_dna(str(fastapi_project), "repo-1")
+        assert dna.to_markdown() is dna.to_markdown()
+
+        data = dna.to_dict()
+        data["cached"] = True
+        assert "cached" not in dna.to_dict()
+        assert "_markdown" not in data
+
+    def test_to_json_matches_to_dict(self, extractor, fastapi_project):
+        import json
+        from unittest.mock import patch
+        from services import dna_extractor
+
+        dna = extractor.extract_dna(str(fastapi_project), "repo-1")
+        expected = json.loads(json.dumps(dna.to_dict()))
+        assert json.loads(dna.to_json()) == expected
+        with patch.object(dna_extractor, "orjson", None):
+            assert json.loads(dna.to_json()) == expected
+
+    def test_from_dict_ignores_unknown_keys(self):
+        from services.dna_extractor import CodebaseDNA
+
+        dna = CodebaseDNA.from_dict({
+            "repo_id": "repo-1",
+            "future_field": 1,
+            "auth_patterns": {"middleware_used": ["require_auth"], "future_field": 2},
+        })
+        assert dna.repo_id == "repo-1"
+        assert dna.auth_patterns.middleware_used == ["require_auth"]
+
+    def test_load_from_cache(self, extractor, fastapi_project):
+        dna = extractor.extract_dna(str(fastapi_project), "repo-1")
+        _cache_returns(extractor, dna)
+        assert extractor.load_from_cache("repo-1") == dna
+
+    def test_load_from_cache_miss(self, extractor):
+        assert extractor.load_from_cache("repo-1") is None
+
+    def test_unchanged_tree_reuses_cached_dna(self, extractor, fastapi_project):
+        from unittest.mock import patch
+
+        dna = extractor.extract_dna(str(fastapi_project), "repo-1")
+        assert dna.tree_hash
+
+        with patch.object(extractor, "_analyze_files") as analyze:
+            again = extractor.extract_dna(str(fastapi_project), "repo-1", cached=dna)
+        analyze.assert_not_called()
+        assert again is dna
+
+    def test_changed_tree_re_extracts(self, extractor, fastapi_project):
+        dna = extractor.extract_dna(str(fastapi_project), "repo-1")
+
+        (fastapi_project / "services" / "new_service.py").write_text("class NewService:\n    pass\n")
+        again = extractor.extract_dna(str(fastapi_project), "repo-1", cached=dna)
+        assert again.tree_hash != dna.tree_hash
+        assert again.language_distribution == {"python": 9}
+
+    def test_rules_file_change_changes_fingerprint(self, extractor, fastapi_project):
+        files = extractor._discover_files(fastapi_project)
+        before = extractor._tree_fingerprint(fastapi_project, files)
+        (fastapi_project / "CLAUDE.md").write_text("# Rules\n\n- Use camelCase now\n")
+        assert extractor._tree_fingerprint(fastapi_project, files) != before
+
+    def test_team_rules_reused_until_rules_file_changes(self, extractor, fastapi_project):
+        from unittest.mock import patch
+
+        extractor.extract_dna(str(fastapi_project), "repo-1")
+        rules = fastapi_project / "CLAUDE.md"
+        with patch.object(extractor, "_safe_read_file", wraps=extractor._safe_read_file) as read:
+            dna = extractor.extract_dna(str(fastapi_project), "repo-1")
+            assert rules not in [call.args[0] for call in read.call_args_list]
+        assert dna.team_rules == "# Rules\n\n- Use snake_case"
+
+        rules.write_text("# Rules\n\n- Use camelCase now\n")
+        assert extractor.extract_dna(str(fastapi_project), "repo-1").team_rules == "# Rules\n\n- Use camelCase now"
+
+    def test_team_rules_cache_is_per_instance_and_bounded(self, extractor, tmp_path, monkeypatch):
+        from services.dna_extractor import DNAExtractor
+
+        monkeypatch.setattr(DNAExtractor, "TEAM_RULES_CACHE_MAX_REPOS", 2)
+        for name in ("a", "b", "c"):
+            (tmp_path / name).mkdir()
+            (tmp_path / name / "CLAUDE.md").write_text(f"rules {name}\n")
+            extractor._extract_team_rules(tmp_path / name)
+
+        assert list(extractor._team_rules_cache) == [tmp_path / "b", tmp_path / "c"]
+        assert DNAExtractor()._team_rules_cache == {}
+
+    def test_forget_repo_drops_its_rules(self, extractor, fastapi_project):
+        extractor.extract_dna(str(fastapi_project), "repo-1")
+        assert fastapi_project in extractor._team_rules_cache
+
+        extractor.forget_repo(str(fastapi_project))
+
+        assert fastapi_project not in extractor._team_rules_cache
+
+
+def _set_head(repo_path, sha):
+    """Give repo_path a minimal .git with HEAD on main at sha"""
+    (repo_path / ".git" / "refs" / "heads").mkdir(parents=True, exist_ok=True)
+    (repo_path / ".git" / "HEAD").write_text("ref: refs/heads/main\n")
+    (repo_path / ".git" / "refs" / "heads" / "main").write_text(sha + "\n")
+
+
+class TestReadHeadSha:
+
+    def test_branch_ref(self, tmp_path):
+        from services.dna_extractor import _read_head_sha
+
+        _set_head(tmp_path, "a" * 40)
+        assert _read_head_sha(tmp_path) == "a" * 40
+
+    def test_packed_ref(self, tmp_path):
+        from services.dna_extractor import _read_head_sha
+
+        (tmp_path / ".git").mkdir()
+        (tmp_path / ".git" / "HEAD").write_text("ref: refs/heads/main\n")
+        (tmp_path / ".git" / "packed-refs").write_text(
+            "# pack-refs with: peeled fully-peeled sorted\n"
+            f"{'b' * 40} refs/heads/main\n"
+        )
+        assert _read_head_sha(tmp_path) == "b" * 40
+
+    def test_detached_head(self, tmp_path):
+        from services.dna_extractor import _read_head_sha
+
+        (tmp_path / ".git").mkdir()
+        (tmp_path / ".git" / "HEAD").write_text("c" * 40 + "\n")
+        assert _read_head_sha(tmp_path) == "c" * 40
+
+    def test_not_a_checkout(self, tmp_path):
+        from services.dna_extractor import _read_head_sha
+
+        assert _read_head_sha(tmp_path) is None
+
+
+class TestDnaRoute:
+    """GET /repos/{id}/dna serves cached DNA only while the tree is unchanged"""
+
+    @pytest.fixture
+    def dna_route(self, extractor, fastapi_project, tmp_path_factory):
+        from unittest.mock import AsyncMock, patch
+
+        # ensure_clone is mocked, but the clone-present check runs for real
+        repos_dir = tmp_path_factory.mktemp("repos")
+        (repos_dir / "repo-1" / ".git").mkdir(parents=True)
+
+        repo = {"id": "repo-1", "local_path": str(fastapi_project), "include_paths": None}
+        with patch("routes.analysis.get_repo_or_404", return_value=repo), \
+             patch("routes.analysis.repo_manager.repos_dir", repos_dir), \
+             patch("routes.analysis.repo_manager.ensure_clone", new=AsyncMock(return_value=str(fastapi_project))), \
+             patch("routes.analysis.dna_extractor", extractor), \
+             patch.object(extractor, "save_to_cache") as save:
+            yield save
+
+    def test_unchanged_tree_serves_cache(self, client, extractor, fastapi_project, dna_route):
+        from unittest.mock import patch
+
+        _cache_returns(extractor, extractor.extract_dna(str(fastapi_project), "repo-1"))
+
+        with patch.object(extractor, "_analyze_files") as analyze:
+            resp = client.get("/api/v1/repos/repo-1/dna")
+
+        assert resp.status_code == 200
+        assert resp.json()["cached"] is True
+        analyze.assert_not_called()
+        dna_route.assert_not_called()
+
+    def test_unchanged_head_skips_the_tree_walk(self, client, extractor, fastapi_project, dna_route):
+        from unittest.mock import patch
+
+        _set_head(fastapi_project, "a" * 40)
+        _cache_returns(extractor, extractor.extract_dna(str(fastapi_project), "repo-1"))
+
+        with patch.object(extractor, "_discover_files") as discover:
+            resp = client.get("/api/v1/repos/repo-1/dna")
+
+        assert resp.status_code == 200
+        assert resp.json()["cached"] is True
+        discover.assert_not_called()
+        dna_route.assert_not_called()
+
+    def test_new_head_same_tree_records_the_ref(self, client, extractor, fastapi_project, dna_route):
+        from unittest.mock import patch
+
+        _set_head(fastapi_project, "a" * 40)
+        _cache_returns(extractor, extractor.extract_dna(str(fastapi_project), "repo-1"))
+        _set_head(fastapi_project, "b" * 40)
+
+        with patch.object(extractor, "_analyze_files") as analyze:
+            resp = client.get("/api/v1/repos/repo-1/dna")
+
+        assert resp.status_code == 200
+        assert resp.json()["cached"] is True
+        analyze.assert_not_called()
+        (_, saved), _ = dna_route.call_args
+        assert "b" * 40 in saved.source_ref
+
+    def test_stale_tree_re_extracts(self, client, extractor, fastapi_project, dna_route):
+        _set_head(fastapi_project, "a" * 40)
+        _cache_returns(extractor, extractor.extract_dna(str(fastapi_project), "repo-1"))
+        (fastapi_project / "services" / "new_service.py").write_text("class NewService:\n    pass\n")
+        _set_head(fastapi_project, "b" * 40)
+
+        resp = client.get("/api/v1/repos/repo-1/dna")
+
+        assert resp.status_code == 200
+        assert resp.json()["cached"] is False
+        assert resp.json()["language_distribution"] == {"python": 9}
+        dna_route.assert_called_once()
+
+    def test_missing_clone_serves_cache_without_cloning(self, client, extractor, fastapi_project,
+                                                        dna_route, tmp_path_factory):
+        from unittest.mock import patch
+
+        _cache_returns(extractor, extractor.extract_dna(str(fastapi_project), "repo-1"))
+
+        # Fresh container: ./repos was wiped but the cached row survived
+        with patch("routes.analysis.repo_manager.repos_dir", tmp_path_factory.mktemp("wiped")), \
+             patch("routes.analysis.repo_manager.ensure_clone") as ensure_clone:
+            resp = client.get("/api/v1/repos/repo-1/dna")
+
+        assert resp.status_code == 200
+        assert resp.json()["cached"] is True
+        ensure_clone.assert_not_called()
+        dna_route.assert_not_called()
+
+    def test_clone_failure_falls_back_to_cache(self, client, extractor, fastapi_project, dna_route):
+        from unittest.mock import AsyncMock, patch
+        from services.repo_manager import RepoCloneError
+
+        _cache_returns(extractor, extractor.extract_dna(str(fastapi_project), "repo-1"))
+
+        with patch("routes.analysis.repo_manager.ensure_clone",
+                   new=AsyncMock(side_effect=RepoCloneError("repo-1", "no git_url on record"))):
+            resp = client.get("/api/v1/repos/repo-1/dna")
+
+        assert resp.status_code == 200
+        assert resp.json()["cached"] is True
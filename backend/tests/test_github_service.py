@@ -0,0 +1,255 @@
+"""
+Tests for GitHubService repo listing (concurrent pagination and the
+in-process repo cache) plus the GitHub connection store's caching and
+batched last_used_at writes. HTTP is served by an httpx.MockTransport.
+"""
+from unittest.mock import MagicMock
+
+import httpx
+import pytest
+
+import services.github as github_module
+import services.github_connections as connections_module
+from services.github import GitHubService, clear_repo_cache
+from services.github_connections import (
+    delete_connection, flush_last_used, get_connection, save_connection, update_last_used,
+)
+
+
+LAST_PAGE = 3
+
+
+class FakeGitHub:
+    """Serves /user/repos with LAST_PAGE pages of two repos each (one fork)."""
+
+    def __init__(self, fail_page=None):
+        self.fail_page = fail_page
+        self.requests = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        page = int(request.url.params["page"])
+        self.requests.append((request.headers["authorization"], page))
+        if page == self.fail_page:
+            return httpx.Response(401, json={"message": "Bad credentials"})
+
+        headers = {}
+        if page < LAST_PAGE:
+            headers["link"] = (
+                f'<https://api.github.com/user/repos?page={page + 1}>; rel="next", '
+                f'<https://api.github.com/user/repos?page={LAST_PAGE}>; rel="last"'
+            )
+        body = [
+            {"id": page * 10, "name": f"repo{page}", "fork": False, "owner": {"login": "me"}},
+            {"id": page * 10 + 1, "name": f"fork{page}", "fork": True, "owner": {"login": "me"}},
+        ]
+        return httpx.Response(200, json=body, headers=headers)
+
+
+@pytest.fixture
+def fake_github(monkeypatch):
+    """Point GitHubService at a fake API and start with an empty cache."""
+    fake = FakeGitHub()
+    client = httpx.AsyncClient(
+        base_url=github_module.GITHUB_API_BASE,
+        transport=httpx.MockTransport(fake),
+    )
+    monkeypatch.setattr(github_module, "_get_client", lambda: client)
+    clear_repo_cache()
+    yield fake
+    clear_repo_cache()
+
+
+class TestGetAllRepos:
+
+    async def test_fetches_every_page_in_order(self, fake_github):
+        repos = await GitHubService("token").get_all_repos()
+
+        assert [r.id for r in repos] == [10, 20, 30]
+        assert sorted(page for _, page in fake_github.requests) == [1, 2, 3]
+
+    async def test_respects_max_pages(self, fake_github):
+        repos = await GitHubService("token").get_all_repos(max_pages=2)
+
+        assert [r.id for r in repos] == [10, 20]
+        assert sorted(page for _, page in fake_github.requests) == [1, 2]
+
+    async def test_page_error_propagates(self, fake_github):
+        fake_github.fail_page = 2
+
+        with pytest.raises(RuntimeError, match="401"):
+            await GitHubService("token").get_all_repos()
+
+
+class TestRepoCache:
+
+    async def test_repeat_listing_served_from_cache(self, fake_github):
+        service = GitHubService("token")
+        first = await service.get_repos(page=1)
+        second = await service.get_repos(page=1)
+
+        assert [r.id for r in first] == [r.id for r in second] == [10]
+        assert len(fake_github.requests) == 1
+
+    async def test_cache_is_per_token(self, fake_github):
+        await GitHubService("token-a").get_repos(page=1)
+        await GitHubService("token-b").get_repos(page=1)
+
+        assert [auth for auth, _ in fake_github.requests] == ["Bearer token-a", "Bearer token-b"]
+
+    async def test_expired_entries_are_refetched(self, fake_github, monkeypatch):
+        service = GitHubService("token")
+        await service.get_repos(page=1)
+        monkeypatch.setattr(github_module, "REPO_CACHE_TTL_SECONDS", -1)
+        clear_repo_cache()
+        await service.get_repos(page=1)
+        await service.get_repos(page=1)
+
+        assert len(fake_github.requests) == 3
+
+    async def test_callers_cannot_mutate_cached_pages(self, fake_github):
+        service = GitHubService("token")
+        all_repos = await service.get_all_repos()
+        all_repos.clear()
+
+        assert [r.id for r in await service.get_repos(page=1)] == [10]
+
+    async def test_errors_are_not_cached(self, fake_github):
+        service = GitHubService("token")
+        fake_github.fail_page = 1
+        with pytest.raises(RuntimeError):
+            await service.get_repos(page=1)
+
+        fake_github.fail_page = None
+        assert [r.id for r in await service.get_repos(page=1)] == [10]
+
+
+@pytest.fixture
+def mock_db(monkeypatch):
+    """Supabase client mock for github_connections, with its caches emptied."""
+    db = MagicMock()
+    service = MagicMock()
+    service.client = db
+    monkeypatch.setattr(connections_module, "get_supabase_service", lambda: service)
+    connections_module._connection_cache.clear()
+    connections_module._last_used_pending.clear()
+    yield db
+    connections_module._connection_cache.clear()
+    connections_module._last_used_pending.clear()
+
+
+def _select_result(db):
+    return db.table.return_value.select.return_value.eq.return_value.execute
+
+
+class TestSharedClient:
+
+    @pytest.fixture(autouse=True)
+    def fresh_client(self, monkeypatch):
+        monkeypatch.setattr(github_module, "_client", None)
+        monkeypatch.setattr(github_module, "_client_loop", None)
+
+    def test_client_from_a_closed_loop_is_closed_on_replace(self):
+        import asyncio
+
+        async def get_client():
+            return github_module._get_client()
+
+        old = asyncio.run(get_client())
+
+        async def replace():
+            new = github_module._get_client()
+            await asyncio.gather(*github_module._retiring)
+            return new
+
+        new = asyncio.run(replace())
+        assert new is not old
+        assert old.is_closed
+        asyncio.run(github_module.close_github_client())
+
+    def test_client_from_a_live_loop_is_closed_on_that_loop(self):
+        import asyncio
+        import threading
+
+        other = asyncio.new_event_loop()
+        thread = threading.Thread(target=other.run_forever, daemon=True)
+        thread.start()
+        try:
+            async def get_client():
+                return github_module._get_client()
+
+            old = asyncio.run_coroutine_threadsafe(get_client(), other).result(timeout=5)
+            new = asyncio.run(get_client())
+            # the close was queued on the other loop; a no-op round trip drains it
+            asyncio.run_coroutine_threadsafe(asyncio.sleep(0.01), other).result(timeout=5)
+
+            assert new is not old
+            assert old.is_closed
+            asyncio.run(github_module.close_github_client())
+        finally:
+            other.call_soon_threadsafe(other.stop)
+            thread.join(timeout=5)
+            other.close()
+
+
+class TestConnectionCache:
+
+    def test_repeat_lookups_hit_the_cache(self, mock_db):
+        _select_result(mock_db).return_value.data = [{"user_id": "u1", "access_token": "t"}]
+
+        assert get_connection("u1")["access_token"] == "t"
+        assert get_connection("u1")["access_token"] == "t"
+        assert _select_result(mock_db).call_count == 1
+
+    def test_missing_connection_is_not_cached(self, mock_db):
+        _select_result(mock_db).return_value.data = []
+        assert get_connection("u1") is None
+
+        _select_result(mock_db).return_value.data = [{"user_id": "u1", "access_token": "t"}]
+        assert get_connection("u1")["access_token"] == "t"
+
+    def test_save_and_delete_evict(self, mock_db):
+        _select_result(mock_db).return_value.data = [{"user_id": "u1", "access_token": "old"}]
+        get_connection("u1")
+
+        save_connection("u1", "new", 1, "me", None, "repo")
+        _select_result(mock_db).return_value.data = [{"user_id": "u1", "access_token": "new"}]
+        assert get_connection("u1")["access_token"] == "new"
+
+        delete_connection("u1")
+        _select_result(mock_db).return_value.data = []
+        assert get_connection("u1") is None
+
+    def test_callers_cannot_mutate_cached_rows(self, mock_db):
+        _select_result(mock_db).return_value.data = [{"user_id": "u1", "access_token": "t"}]
+        get_connection("u1")["access_token"] = "changed"
+
+        assert get_connection("u1")["access_token"] == "t"
+
+
+class TestLastUsedBatching:
+
+    def test_marks_are_written_in_one_update(self, mock_db):
+        for user_id in ["u1", "u2", "u1", "u3"]:
+            update_last_used(user_id)
+        mock_db.table.assert_not_called()
+
+        flush_last_used()
+
+        in_filter = mock_db.table.return_value.update.return_value.in_
+        assert in_filter.call_count == 1
+        column, user_ids = in_filter.call_args.args
+        assert column == "user_id"
+        assert sorted(user_ids) == ["u1", "u2", "u3"]
+
+    def test_flush_with_nothing_pending_skips_db(self, mock_db):
+        flush_last_used()
+
+        mock_db.table.assert_not_called()
+
+    def test_db_errors_are_swallowed(self, mock_db):
+        mock_db.table.side_effect = RuntimeError("db down")
+        update_last_used("u1")
+
+        flush_last_used()
+
+        assert not connections_module._last_used_pending
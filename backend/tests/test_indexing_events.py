@@ -0,0 +1,95 @@
+"""
+Tests for IndexingProgress percent math and IndexingEventPublisher
+progress coalescing.
+"""
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+import services.indexing_events as indexing_events
+from services.indexing_events import IndexingEventPublisher, IndexingProgress, IndexingStats
+
+
+@pytest.fixture
+def mock_redis():
+    redis = MagicMock()
+    redis.publish.return_value = 1
+    return redis
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable monotonic clock for the publisher."""
+    now = [100.0]
+    monkeypatch.setattr(indexing_events.time, "monotonic", lambda: now[0])
+    return now
+
+
+def published(redis):
+    return [json.loads(call.args[1]) for call in redis.publish.call_args_list]
+
+
+class TestIndexingProgress:
+
+    def test_file_phase_is_first_twenty_percent(self):
+        assert IndexingProgress(50, 100, 0).percent == 10
+        assert IndexingProgress(100, 100, 0).percent == 20
+
+    def test_embedding_phase_weights_functions(self):
+        assert IndexingProgress(100, 100, 50, functions_total=100).percent == 60
+        assert IndexingProgress(100, 100, 100, functions_total=100).percent == 100
+
+    def test_partial_phases_floor(self):
+        # 20/3 + 80/3 = 33.33...
+        assert IndexingProgress(1, 3, 1, functions_total=3).percent == 33
+
+    def test_degenerate_totals_are_clamped(self):
+        assert IndexingProgress(5, 0, 0).percent == 0
+        assert IndexingProgress(200, 100, 500, functions_total=100).percent == 100
+
+
+class TestProgressCoalescing:
+
+    def test_rapid_ticks_without_percent_change_are_coalesced(self, mock_redis, clock):
+        publisher = IndexingEventPublisher(mock_redis)
+        # 1000 files: each file moves the file-phase percentage by 0.02
+        for i in range(1, 11):
+            publisher.publish_progress("repo", i, 1000, i, f"file{i}.py")
+
+        events = published(mock_redis)
+        assert len(events) == 1
+        assert events[0]["current_file"] == "file1.py"
+
+    def test_tick_goes_out_once_interval_passes(self, mock_redis, clock):
+        publisher = IndexingEventPublisher(mock_redis)
+        publisher.publish_progress("repo", 1, 1000, 1, "a.py")
+        publisher.publish_progress("repo", 2, 1000, 2, "b.py")
+        clock[0] += IndexingEventPublisher.PROGRESS_INTERVAL_SECONDS
+        publisher.publish_progress("repo", 3, 1000, 3, "c.py")
+
+        assert [e["current_file"] for e in published(mock_redis)] == ["a.py", "c.py"]
+
+    def test_percent_change_is_never_delayed(self, mock_redis, clock):
+        publisher = IndexingEventPublisher(mock_redis)
+        publisher.publish_progress("repo", 1, 10, 1)
+        publisher.publish_progress("repo", 2, 10, 2)
+
+        assert [e["percent"] for e in published(mock_redis)] == [2, 4]
+
+    def test_completed_flushes_pending_progress_first(self, mock_redis, clock):
+        publisher = IndexingEventPublisher(mock_redis)
+        publisher.publish_progress("repo", 1, 1000, 1, "a.py")
+        publisher.publish_progress("repo", 2, 1000, 2, "b.py")
+        publisher.publish_completed("repo", "repo", IndexingStats(1000, 5, 1.0))
+
+        events = published(mock_redis)
+        assert [e["type"] for e in events] == ["progress", "progress", "completed"]
+        assert events[1]["current_file"] == "b.py"
+
+    def test_entities_are_throttled_independently(self, mock_redis, clock):
+        publisher = IndexingEventPublisher(mock_redis)
+        publisher.publish_progress("repo-a", 1, 1000, 1)
+        publisher.publish_progress("repo-b", 1, 1000, 1)
+
+        assert [e["entity_id"] for e in published(mock_redis)] == ["repo-a", "repo-b"]
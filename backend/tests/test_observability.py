@@ -0,0 +1,96 @@
+"""
+Tests for services/observability.py: the track_time timer (context manager
+and sync/async decorator) and the background log writer.
+"""
+import asyncio
+import inspect
+import io
+import time
+
+import pytest
+
+import services.observability as observability
+from services.observability import track_time
+
+
+@pytest.fixture
+def debug_logs(monkeypatch):
+    """Record track_time's completion logs as (message, duration_ms)"""
+    logs = []
+    monkeypatch.setattr(observability.logger, "isEnabledFor", lambda level: True)
+    monkeypatch.setattr(
+        observability.logger, "debug",
+        lambda message, duration_ms, **tags: logs.append((message, duration_ms)),
+    )
+    return logs
+
+
+class TestTrackTime:
+
+    def test_context_manager_logs_completion(self, debug_logs):
+        with track_time("op"):
+            pass
+
+        assert [message for message, _ in debug_logs] == ["op completed"]
+
+    def test_exceptions_propagate_and_still_log(self, debug_logs):
+        with pytest.raises(ValueError):
+            with track_time("op"):
+                raise ValueError("boom")
+
+        assert len(debug_logs) == 1
+
+    def test_sync_decorator(self, debug_logs):
+        @track_time("add")
+        def add(a, b):
+            return a + b
+
+        assert add(1, 2) == 3
+        assert add(2, 2) == 4
+        assert [message for message, _ in debug_logs] == ["add completed"] * 2
+
+    async def test_async_decorator_times_the_whole_call(self, debug_logs):
+        @track_time("sleepy")
+        async def sleepy():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        assert inspect.iscoroutinefunction(sleepy)
+        assert await sleepy() == "done"
+        [(message, duration_ms)] = debug_logs
+        assert message == "sleepy completed"
+        assert duration_ms >= 15
+
+
+class TestLogWriter:
+
+    def test_batch_keeps_order_across_streams(self, monkeypatch):
+        out = io.StringIO()
+        monkeypatch.setattr(observability.sys, "stdout", out)
+        monkeypatch.setattr(observability.sys, "stderr", out)
+
+        observability._write_log_batch([
+            (False, "info 1"), (True, "error 1"), (False, "info 2"), (False, "info 3"),
+        ])
+
+        assert out.getvalue().splitlines() == ["info 1", "error 1", "info 2", "info 3"]
+
+    def test_flush_gives_up_on_a_stuck_writer(self, monkeypatch):
+        # Hold one task open on the real queue, as if a write were blocked
+        # on a stalled pipe; swapping the queue out would strand the writer
+        log_queue = observability._log_queue
+        if observability._log_writer is None:
+            monkeypatch.setattr(observability, "_log_writer", object())
+        with log_queue.all_tasks_done:
+            log_queue.unfinished_tasks += 1
+        try:
+            start = time.monotonic()
+            assert observability.flush_logs(timeout=0.05) is False
+            assert time.monotonic() - start < 1
+        finally:
+            log_queue.task_done()
+
+    def test_flush_returns_once_drained(self):
+        observability.logger.info("flush me")
+
+        assert observability.flush_logs() is True